@@ -0,0 +1,80 @@
+# Checks that get_poly_points() of parametric_lines.py reads back what set_poly_points() wrote,
+# using a stand-in for the points collection of a POLY spline. Runs outside Blender: only numpy
+# is needed.
+import ast
+import os
+import numpy as np
+
+def load_functions(script, names, namespace):
+    # Compile the top-level functions 'names' of 'script' into 'namespace' straight from its
+    # source, so the shipped code is checked without running the rest of the script (which
+    # needs Blender)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in functions}
+    if missing:
+        raise LookupError("%s has no function %s" % (script, ", ".join(sorted(missing))))
+    exec(compile(ast.Module(body=functions, type_ignores=[]), path, "exec"), namespace)
+
+load_functions("parametric_lines.py", ["set_poly_points", "get_poly_points"], globals())
+
+class SplinePoints:
+    # Behaves like bpy SplinePoints for add() and the "co" attribute of foreach_get/foreach_set:
+    # (x, y, z, w) float32 per point, and the flat buffer must match the point count exactly
+    def __init__(self, count):
+        self.co = np.zeros((count, 4), dtype=np.float32)
+        self.co[:, 3] = 1
+
+    def __len__(self):
+        return len(self.co)
+
+    def add(self, count):
+        added = np.zeros((count, 4), dtype=np.float32)
+        added[:, 3] = 1
+        self.co = np.concatenate([self.co, added])
+
+    def foreach_set(self, attribute, values):
+        assert attribute == "co" and len(values) == self.co.size
+        self.co[:] = np.asarray(values).reshape(-1, 4)
+
+    def foreach_get(self, attribute, values):
+        assert attribute == "co" and len(values) == self.co.size
+        values[:] = self.co.ravel()
+
+class Spline:
+    def __init__(self, count=1):
+        # curve_data.splines.new('POLY') starts with one point
+        self.points = SplinePoints(count)
+
+# The curve of parametric_lines.py
+t = np.arange(1.05, 5, 0.01)
+points = np.stack([0.32*(1 - t) * np.cos(10 * t),
+                   0.32*(1 - t) * np.sin(10 * t),
+                   2.6-0.6*t], axis=1)
+
+polyline = Spline()
+set_poly_points(polyline, points)
+assert len(polyline.points) == len(points)
+assert np.all(polyline.points.co[:, 3] == 1)
+read_back = get_poly_points(polyline)
+assert read_back.shape == points.shape
+assert np.array_equal(read_back, points.astype(np.float32))
+print("%d points written and read back unchanged (float32)" % len(points))
+
+# Writing again over the same spline reuses its points instead of adding more
+set_poly_points(polyline, 2*points)
+assert len(polyline.points) == len(points)
+assert np.array_equal(get_poly_points(polyline), (2*points).astype(np.float32))
+print("Rewriting the spline keeps %d points" % len(polyline.points))
+
+# Fewer points than the spline holds is refused up front instead of failing inside foreach_set
+try:
+    set_poly_points(polyline, points[:10])
+except ValueError as error:
+    print("Shorter point array refused: %s" % error)
+else:
+    raise AssertionError("set_poly_points accepted fewer points than the spline holds")
+assert np.array_equal(get_poly_points(polyline), (2*points).astype(np.float32))
+print("All checks passed")
@@ -1,28 +1,54 @@
 import bpy
 import numpy as np
 
+def sample_curve(x, y, z, t, dtype=np.float64):
+    # x(t), y(t), z(t) are numpy-broadcastable callables or expression strings in 't'.
+    # Every component is evaluated over the whole 't' array in a single pass.
+    namespace = {name: getattr(np, name) for name in ("sin", "cos", "tan", "exp", "log", "sqrt",
+                                                      "sinh", "cosh", "tanh", "abs", "pi", "e")}
+    namespace["__builtins__"] = {}
+    points = np.empty((len(t), 3), dtype=dtype)
+    for i, component in enumerate((x, y, z)):
+        if isinstance(component, str):
+            points[:, i] = eval(component, namespace, {"t": t})
+        else:
+            points[:, i] = component(t)
+    return points
+
+def set_poly_points(polyline, points):
+    # Pack the (N,3) points into the (N,4) homogeneous buffer of a POLY spline
+    # and upload it with a single foreach_set call. Points can be added to a spline but not
+    # removed, so the spline must not already hold more points than 'points'.
+    missing = len(points) - len(polyline.points)
+    if missing < 0:
+        raise ValueError("The spline has %d points, more than the %d given; create a new spline"
+                         % (len(polyline.points), len(points)))
+    if missing > 0:
+        polyline.points.add(missing)
+    co = np.ones((len(points), 4), dtype=np.float32)
+    co[:, :3] = points
+    polyline.points.foreach_set("co", co.ravel())
+
+def get_poly_points(polyline):
+    # Bulk read-back of the spline points as an (N,3) array
+    co = np.empty(len(polyline.points) * 4, dtype=np.float32)
+    polyline.points.foreach_get("co", co)
+    return co.reshape(-1, 4)[:, :3]
+
 # Set time 't' axis
 t = np.arange(1.05, 5, 0.01)
 
 # Set curve coordinates
-points = np.zeros((len(t), 3))
-
-for N in range(len(t)):
-    x = 0.32*(1 - t[N]) * np.cos(10 * t[N])
-    y = 0.32*(1 - t[N]) * np.sin(10 * t[N])
-    z = 2.6-0.6*t[N]
-    points[N] = [x, y, z]
+points = sample_curve(lambda t: 0.32*(1 - t) * np.cos(10 * t),
+                      lambda t: 0.32*(1 - t) * np.sin(10 * t),
+                      lambda t: 2.6-0.6*t,
+                      t)
 
 # Create the curve and set its points
 curve_data = bpy.data.curves.new(name='ParametricLine', type='CURVE')
 
 polyline = curve_data.splines.new('POLY')
-polyline.points.add(len(points) - 1)
-
-for N in range(len(points)):
-    x, y, z = points[N]
-    polyline.points[N].co = (x, y, z, 1)
+set_poly_points(polyline, points)
 
 curve_object = bpy.data.objects.new('ParametricLine', curve_data)
 bpy.context.collection.objects.link(curve_object)
-
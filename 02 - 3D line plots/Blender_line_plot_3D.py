@@ -1,34 +1,106 @@
 import bpy
 import numpy as np
-from math import radians, sin, cos, ceil, floor
+from mathutils import Matrix, Vector
+from math import radians, cos, ceil, floor
+
+def session_cache(name):
+    # Dictionary that outlives a single run of the script: it lives as long as the Blender session
+    return bpy.app.driver_namespace.setdefault(name, {})
+
+def material_alive(material):
+    # False once the datablock has been removed from bpy.data
+    try:
+        material.name
+    except ReferenceError:
+        return False
+    return True
+
+# Number of material datablocks built and reused by this run
+material_stats = {"created": 0, "reused": 0}
+
+def get_material(name, build, key=()):
+    # Every material the script builds goes through this registry. A material is cached for the
+    # session under its name and 'key' (whatever build() bakes into it, such as a colour) and is
+    # only built, by build(material), when it is missing or was deleted. Every frame, every
+    # re-run of the script and the other plot scripts then share one datablock.
+    cache = session_cache("materials")
+    cache_key = (name,) + tuple(key)
+    material = cache.get(cache_key)
+    if material is None or not material_alive(material):
+        material = bpy.data.materials.new(name=name)
+        build(material)
+        cache[cache_key] = material
+        material_stats["created"] += 1
+    else:
+        material_stats["reused"] += 1
+    return material
 
 def create_diffuse_material(mesh, colour, name):
-    material = bpy.data.materials.new(name = name)
-    material.diffuse_color = colour
-    mesh.data.materials.append(material)
+    # Objects with the same material name and colour share one material datablock
+    def build(material):
+        material.diffuse_color = colour
+    mesh.data.materials.append(get_material(name, build, tuple(colour)))
+
+def purge_unused_materials():
+    # Remove the registry's materials that no longer have any users
+    cache = session_cache("materials")
+    unused = [key for key, material in cache.items() if not material_alive(material) or material.users == 0]
+    bpy.data.batch_remove([cache[key] for key in unused if material_alive(cache[key])])
+    for key in unused:
+        del cache[key]
+    return len(unused)
+
+def sample_curve(x, y, z, t, dtype=np.float64):
+    # x(t), y(t), z(t) are numpy-broadcastable callables or expression strings in 't'.
+    # Every component is evaluated over the whole 't' array in a single pass.
+    namespace = {name: getattr(np, name) for name in ("sin", "cos", "tan", "exp", "log", "sqrt",
+                                                      "sinh", "cosh", "tanh", "abs", "pi", "e")}
+    namespace["__builtins__"] = {}
+    points = np.empty((len(t), 3), dtype=dtype)
+    for i, component in enumerate((x, y, z)):
+        if isinstance(component, str):
+            points[:, i] = eval(component, namespace, {"t": t})
+        else:
+            points[:, i] = component(t)
+    return points
+
+def set_poly_points(polyline, points):
+    # Pack the (N,3) points into the (N,4) homogeneous buffer of a POLY spline
+    # and upload it with a single foreach_set call.
+    missing = len(points) - len(polyline.points)
+    if missing > 0:
+        polyline.points.add(missing)
+    co = np.ones((len(points), 4), dtype=np.float32)
+    co[:, :3] = points
+    polyline.points.foreach_set("co", co.ravel())
+
+def get_poly_points(polyline):
+    # Bulk read-back of the spline points as an (N,3) array
+    co = np.empty(len(polyline.points) * 4, dtype=np.float32)
+    polyline.points.foreach_get("co", co)
+    return co.reshape(-1, 4)[:, :3]
+
+def compute_bounds(coords, percentile=None):
+    # Per-axis (mins, maxs) of an (N,3) array in a single reduction. 'percentile' clips
+    # noisy data to the [percentile, 100 - percentile] range instead of the raw extremes.
+    if percentile is None:
+        return coords.min(axis=0), coords.max(axis=0)
+    return np.percentile(coords, [percentile, 100 - percentile], axis=0)
 
 # Set time 't' axis
 t = np.arange(0, 3, 0.001)
 
-# Set curve coordinates
-points = np.zeros((len(t), 3))
-
 # Define line x(t),y(t),z(t) equation:
-for N in range(len(t)):
-    x = 0.52*(1 - t[N]) * cos(10 * t[N])
-    y = 0.52*(1 - t[N]) * sin(10 * t[N])
-    z = 1-0.6*t[N]
-    points[N] = [x, y, z]
+points = sample_curve(lambda t: 0.52*(1 - t) * np.cos(10 * t),
+                      lambda t: 0.52*(1 - t) * np.sin(10 * t),
+                      lambda t: 1-0.6*t,
+                      t)
 
 # Create the curve and set its points
 curve_data = bpy.data.curves.new(name='ParametricLine', type='CURVE')
 
 polyline = curve_data.splines.new('POLY')
-polyline.points.add(len(points) - 1)
-
-for N in range(len(points)):
-    x, y, z = points[N]
-    polyline.points[N].co = (x, y, z, 1)
+set_poly_points(polyline, points)
 
 curve_object = bpy.data.objects.new('ParametricLine', curve_data)
 bpy.context.collection.objects.link(curve_object)
@@ -39,18 +111,8 @@ create_diffuse_material(curve_object, (0.016, 0.032, 0.869, 1), "line_material")
 # Give thickness to the line so it can be rendered
 curve_object.data.bevel_depth = 0.01
 
-# Iterate through the points and find min and max
-max_x, max_y, max_z = points[0]
-min_x, min_y, min_z = points[0]
-
-for point in points:
-    x, y, z = point
-    max_x = max(max_x, x)
-    max_y = max(max_y, y)
-    max_z = max(max_z, z)
-    min_x = min(min_x, x)
-    min_y = min(min_y, y)
-    min_z = min(min_z, z)
+# Find min and max of the points
+(min_x, min_y, min_z), (max_x, max_y, max_z) = compute_bounds(points)
 
 def set_white_background():
     bpy.context.scene.render.engine = 'CYCLES'
@@ -67,25 +129,195 @@ def set_white_background():
     # Set this thing to 1
     alpha_over_node.premul = 1
 
-def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label):
-    bpy.ops.mesh.primitive_cylinder_add(radius=1, depth=1)
-    bpy.ops.transform.resize(value=(thickness, thickness, thickness))
+def create_mesh_object(name, vertices, corner_vertices, face_sizes):
+    # Build a mesh straight from numpy arrays: (V,3) vertex coordinates, the vertex index of
+    # every face corner and the number of corners of every face. No operators are involved.
+    face_sizes = np.asarray(face_sizes, dtype=np.int32)
+    loop_start = np.zeros(len(face_sizes), dtype=np.int32)
+    np.cumsum(face_sizes[:-1], out=loop_start[1:])
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.loops.add(len(corner_vertices))
+    mesh.polygons.add(len(face_sizes))
+    mesh.vertices.foreach_set("co", np.asarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.asarray(corner_vertices, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    # Newer Blender versions derive the face sizes from loop_start
+    if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+    mesh.update(calc_edges=True)
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.collection.objects.link(obj)
+    return obj
+
+def axis_frame(direction):
+    # Two unit vectors perpendicular to 'direction' and to each other, (u, v, direction) right-handed
+    w = np.asarray(direction, dtype=np.float64)
+    w = w / np.linalg.norm(w)
+    helper = np.array([0, 0, 1.0]) if abs(w[2]) < 0.999 else np.array([1.0, 0, 0])
+    u = np.cross(helper, w)
+    u /= np.linalg.norm(u)
+    return u, np.cross(w, u)
+
+def cylinder_geometry(start, end, radius, segments=32):
+    # Vertices and faces of a capped cylinder of 'radius' running from point 'start' to point 'end'
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    u, v = axis_frame(end - start)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + start, ring + end])
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    sides = np.stack([i, j, j + segments, i + segments], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1], i + segments])
+    face_sizes = np.concatenate([np.full(segments, 4), [segments, segments]])
+    return vertices, corner_vertices, face_sizes
+
+def cone_geometry(base, tip, radius, segments=32):
+    # Vertices and faces of a cone with a base of 'radius' centred on 'base' and its apex at 'tip'
+    base = np.asarray(base, dtype=np.float64)
+    u, v = axis_frame(np.asarray(tip, dtype=np.float64) - base)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + base, [tip]])
+    i = np.arange(segments)
+    sides = np.stack([i, (i + 1) % segments, np.full(segments, segments)], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1]])
+    face_sizes = np.concatenate([np.full(segments, 3), [segments]])
+    return vertices, corner_vertices, face_sizes
+
+def quad_geometry(centres, u, v):
+    # Vertices and faces of one rectangle per centre, spanning centre - u - v to centre + u + v.
+    # 'centres' is a single point or a (K,3) array of them.
+    centres = np.reshape(np.asarray(centres, dtype=np.float64), (-1, 3))
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) @ np.array([u, v], dtype=np.float64)
+    vertices = (centres[:, None, :] + corners).reshape(-1, 3)
+    return vertices, np.arange(len(vertices)), np.full(len(centres), 4)
+
+def points_along(x, y, z):
+    # (K,3) points from coordinates that are each a scalar or an array of length K
+    return np.column_stack(np.broadcast_arrays(x, y, z))
+
+def merge_geometry(parts):
+    # Concatenate (vertices, corner_vertices, face_sizes) parts into one, offsetting their indices
+    offsets = np.cumsum([0] + [len(vertices) for vertices, _, _ in parts[:-1]])
+    return (np.concatenate([vertices for vertices, _, _ in parts]),
+            np.concatenate([corners + offset for (_, corners, _), offset in zip(parts, offsets)]),
+            np.concatenate([sizes for _, _, sizes in parts]))
+
+# Axis, cone, grid line and plane geometry of the plot, grouped by (material name, colour)
+axis_geometry = {}
+
+def add_axis_geometry(material, colour, geometry):
+    axis_geometry.setdefault((material, tuple(colour)), []).append(geometry)
+
+def create_axis_objects():
+    # Build one mesh object per material out of everything create_axis() collected
+    objects = []
+    for (material, colour), parts in axis_geometry.items():
+        obj = create_mesh_object("axes." + material, *merge_geometry(parts))
+        create_diffuse_material(obj, colour, material)
+        objects.append(obj)
+    axis_geometry.clear()
+    return objects
+
+# Text of the tick labels, axis labels and title: (body, location, size, rotation) per label
+axis_labels = []
+
+def add_axis_label(body, location, size, rotation=None):
+    # 'rotation' is a 3x3 matrix; labels without one face the camera given to create_label_objects()
+    axis_labels.append((body, location, size, rotation))
+
+def camera_facing_rotation(camera):
+    # Rotation that turns text to face 'camera', as a matrix. It is read from matrix_basis,
+    # which follows camera.location and camera.rotation_euler as soon as the script sets them;
+    # matrix_world is only refreshed by the next depsgraph evaluation. The camera has no parent.
+    view_vector = camera.matrix_basis.to_quaternion() @ Vector((0, 0, 1))
+    return np.array(view_vector.to_track_quat('Z', 'Y').to_matrix())
+
+def mesh_geometry(mesh):
+    # (vertices, corner_vertices, face_sizes) of a mesh, read with foreach_get
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    corner_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_vertices)
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", face_sizes)
+    return vertices.reshape(-1, 3), corner_vertices, face_sizes
+
+def convert_font_curves(texts, font=None):
+    # Mesh geometry of unit-size text for every string in 'texts', converted from temporary font
+    # curves after a single depsgraph evaluation
+    curves = []
+    objects = []
+    for body in texts:
+        curve = bpy.data.curves.new("label", type='FONT')
+        curve.body = body
+        if font is not None:
+            curve.font = font
+        obj = bpy.data.objects.new("label", curve)
+        bpy.context.scene.collection.objects.link(obj)
+        curves.append(curve)
+        objects.append(obj)
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    meshes = [bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph)) for obj in objects]
+    geometry = [mesh_geometry(mesh) for mesh in meshes]
+    bpy.data.batch_remove(objects + curves + meshes)
+    return geometry
+
+def glyph_atlas(characters, font=None):
+    # Unit-size geometry and advance of every character of a font, kept for the whole session.
+    # Only characters that are not in the atlas yet are converted, all in one pass. The advance
+    # of a character is how far it pushes a following "|": the width of "|c|" minus that of "||".
+    glyphs = session_cache("label_glyphs").setdefault(None if font is None else font.name_full, {})
+    missing = sorted(set(characters) - set(glyphs))
+    if missing:
+        geometry = convert_font_curves(["||"] + missing + ["|%s|" % c for c in missing], font)
+        bars_width = geometry[0][0][:, 0].max()
+        for n, c in enumerate(missing):
+            framed_width = geometry[1 + len(missing) + n][0][:, 0].max()
+            glyphs[c] = geometry[1 + n] + (framed_width - bars_width,)
+    return glyphs
+
+def label_geometry(body, glyphs):
+    # Unit-size geometry of one line of text, laid out from the atlas glyphs
+    parts = []
+    x = 0.0
+    for c in body:
+        vertices, corner_vertices, face_sizes, advance = glyphs[c]
+        parts.append((vertices + (x, 0, 0), corner_vertices, face_sizes))
+        x += advance
+    return merge_geometry(parts)
+
+def create_label_objects(camera=None, font=None):
+    # Turn every collected label into one joined text mesh, assembled from the glyph atlas so
+    # only characters never used before in this session go through a font curve. The camera
+    # rotation is read once and shared by all the labels that face it (without a camera they
+    # lie in XoY).
+    labels = [label for label in axis_labels if label[0]]
+    axis_labels.clear()
+    if not labels:
+        return None
+    facing = np.eye(3) if camera is None else camera_facing_rotation(camera)
+    glyphs = glyph_atlas("".join(body for body, _, _, _ in labels), font)
+    parts = []
+    for body, location, size, rotation in labels:
+        vertices, corner_vertices, face_sizes = label_geometry(body, glyphs)
+        rotation = facing if rotation is None else np.asarray(rotation)
+        parts.append(((size*vertices) @ rotation.T + location, corner_vertices, face_sizes))
+    obj = create_mesh_object("axes.labels", *merge_geometry(parts))
+    create_diffuse_material(obj, (0, 0, 0, 1), "text_material")
+    return obj
 
+def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label):
     if (axis == 'X'):
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Y')
-        bpy.ops.transform.resize(value=((xlim[1]-xlim[0])/thickness, 1, 1))
-        bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0], zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")  
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=3)
-        bpy.ops.transform.rotate(value=-radians(90), orient_axis='Y')
-        bpy.ops.transform.translate(value=(xlim[1], ylim[0], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the X range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[1], ylim[0], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[1] - 4.5*thickness, ylim[0], zlim[0]),
+                                        (xlim[1] + 4.5*thickness, ylim[0], zlim[0]), 3*thickness))
 
         # Round off x coords used for text and grid lines:
         if (xlim[0] > 0):
@@ -100,77 +332,37 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
             
         xstep = (xmax - xmin)/4
 
+        # Labels stand upright, turned to face the camera side of the plot
+        text_rotation = Matrix.Rotation(radians(180), 3, 'Z') @ Matrix.Rotation(radians(90), 3, 'X')
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xmin + xstep*N + 0.02
-                obj.location.y = ylim[0] + 0.05
-                obj.location.z = zlim[0] + 0.05
-                bpy.ops.transform.rotate(value=radians(-90), orient_axis=axis)
-                bpy.ops.transform.rotate(value=radians(180), orient_axis='Z')
-                text_data = obj.data
-                # Set the content of the text data block
-                text_data.body = str(round((xmin + xstep*N)*10)/10)    
-                text_data.size = 0.13
-                text = bpy.context.active_object
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((xmin + xstep*N)*10)/10), (xmin + xstep*N + 0.02, ylim[0] + 0.05, zlim[0] + 0.05), 0.13, text_rotation)
         # Create 'xlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[1] * (0.95 + len(label)/10)
-        obj.location.y = ylim[0] + 0.05
-        obj.location.z = zlim[0] + 0.05
-        bpy.ops.transform.rotate(value=radians(-90), orient_axis=axis)
-        bpy.ops.transform.rotate(value=radians(180), orient_axis='Z')
-        text_data = obj.data
-        # Set the content of the text data block
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (xlim[1] * (0.95 + len(label)/10), ylim[0] + 0.05, zlim[0] + 0.05), 0.13, text_rotation)
         
         
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xmin + xstep*N, ylim[0], (zlim[1]+zlim[0])*0.5 )) # anchor point
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                               
-            for N in range(1,5):
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xmin + xstep*N, (ylim[1]+ylim[0])*0.5, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-            
-            # Add the plane XoY:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], ylim[1]-ylim[0], 1))                
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, (0.973, 0.973, 0.973, 1), "plane_material")
+            # Lines up the XoZ plane and across the XoY plane at every tick, then the XoY plane
+            x = xmin + xstep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, ylim[0], 0.5*(zlim[1]+zlim[0])),
+                                            (0.25*thickness, 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, 0.5*(ylim[1]+ylim[0]), zlim[0]),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", (0.973, 0.973, 0.973, 1),
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
                             
     elif (axis == 'Y'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.resize(value=(1, (ylim[1]-ylim[0])/thickness, 1))
-        bpy.ops.transform.translate(value=(xlim[0], 0.5*(ylim[1]+ylim[0]), zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.translate(value=(xlim[0], ylim[1], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")   
+        # Axis along the Y range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[1], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[1] - 3*thickness, zlim[0]),
+                                        (xlim[0], ylim[1] + 3*thickness, zlim[0]), 3*thickness))
 
         # Round off y coords used for text and grid lines:
         if (ylim[0] > 0):
@@ -185,78 +377,37 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
             
         ystep = (ymax - ymin)/4
 
+        # Labels stand upright, turned to face the camera side of the plot
+        text_rotation = Matrix.Rotation(radians(90), 3, 'Z') @ Matrix.Rotation(radians(90), 3, 'X')
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[0] + 0.05
-                obj.location.y = ymin + ystep*N - 0.2
-                obj.location.z = zlim[0] + 0.05
-                bpy.ops.transform.rotate(value=radians(-90), orient_axis='X')
-                bpy.ops.transform.rotate(value=radians(-90), orient_axis='Z')
-                text_data = obj.data
-                # Set the content of the text data block
-                text_data.body = str(round((ymin + ystep*N)*10)/10)    
-                text_data.size = 0.13
-                text = bpy.context.active_object
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((ymin + ystep*N)*10)/10), (xlim[0] + 0.05, ymin + ystep*N - 0.2, zlim[0] + 0.05), 0.13, text_rotation)
                 
         # Create 'ylabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[0] + 0.05
-        obj.location.y = ylim[1] * 1.08
-        obj.location.z = zlim[0] + 0.05
-        bpy.ops.transform.rotate(value=radians(-90), orient_axis='X')
-        bpy.ops.transform.rotate(value=radians(-90), orient_axis='Z')
-        text_data = obj.data
-        # Set the content of the text data block
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (xlim[0] + 0.05, ylim[1] * 1.08, zlim[0] + 0.05), 0.13, text_rotation)
             
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # Add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xlim[0], ymin + ystep*N, (zlim[1]+zlim[0])*0.5))
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                
-            for N in range(1,5): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))                
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ymin + ystep*N, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-           
-            # Add the plane YoZ:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(zlim[1]-zlim[0], ylim[1]-ylim[0], 1))    
-            bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)              
-            bpy.ops.transform.translate(value=(xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, (0.961, 0.961, 0.961, 1), "plane_material")   
+            # Lines up the YoZ plane and across the XoY plane at every tick, then the YoZ plane
+            y = ymin + ystep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], y, 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.25*thickness, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), y, zlim[0]),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("plane_material", (0.961, 0.961, 0.961, 1),
+                              quad_geometry((xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.5*(ylim[1]-ylim[0]), 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
                  
     elif (axis == 'Z'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Z')
-        bpy.ops.transform.resize(value=(1, 1, (zlim[1]-zlim[0])/thickness))
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], 0.5*(zlim[1]+zlim[0])))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], zlim[1]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the Z range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[0], zlim[1]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[0], zlim[1] - 3*thickness),
+                                        (xlim[0], ylim[0], zlim[1] + 3*thickness), 3*thickness))
 
         # Round off z coords used for text and grid lines:
         if (zlim[0] > 0):
@@ -271,76 +422,33 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
             
         zstep = (zmax - zmin)/4
         
+        # Labels stand upright, turned to face the camera side of the plot
+        text_rotation = Matrix.Rotation(radians(90), 3, 'Z') @ Matrix.Rotation(radians(90), 3, 'X')
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[0] + 0.05
-                obj.location.y = ylim[0] + 0.05
-                obj.location.z = zmin + zstep*N - 0.10
-                bpy.ops.transform.rotate(value=radians(-90), orient_axis='X')
-                bpy.ops.transform.rotate(value=radians(-90), orient_axis='Z')
-                text_data = obj.data
-                # Set the content of the text data block
-                text_data.body = str(round((zmin + zstep*N)*10)/10)    
-                text_data.size = 0.13
-                text = bpy.context.active_object
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((zmin + zstep*N)*10)/10), (xlim[0] + 0.05, ylim[0] + 0.05, zmin + zstep*N - 0.10), 0.13, text_rotation)
             
         # Create 'zlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[0] + 0.05
-        obj.location.y = ylim[0] + 0.05
-        obj.location.z = zlim[1] * 1.1
-        bpy.ops.transform.rotate(value=radians(-90), orient_axis='X')
-        bpy.ops.transform.rotate(value=radians(-90), orient_axis='Z')
-        text_data = obj.data
-        # Set the content of the text data block
-        text_data.body = label    
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (xlim[0] + 0.05, ylim[0] + 0.05, zlim[1] * 1.1), 0.13, text_rotation)
                           
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,4): #add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ylim[0], zmin + zstep*N)) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                                    
-            for N in range(1,4): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xlim[0], (ylim[1]+ylim[0])*0.5, zmin + zstep*N))  
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")                            
-            
-            #add the XoZ plane:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], zlim[1]-zlim[0], 1))  
-            bpy.ops.transform.rotate(value=radians(90), orient_axis='X')              
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, (0.949, 0.949, 0.949, 1), "plane_material")   
+            # Flat lines along the back edges of the XoY plane at every tick, then the XoZ plane
+            z = zmin + zstep*np.arange(1, 4)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), ylim[0], z),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], 0.5*(ylim[1]+ylim[0]), z),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", (0.949, 0.949, 0.949, 1),
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
 
 def set_title(label):
-    bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-    obj = bpy.context.active_object
-    obj.location.x = xlim[0] + 0.05
-    obj.location.y = ylim[0] - 0.35
-    obj.location.z = zlim[1] * 1.4
-    bpy.ops.transform.rotate(value=radians(-90), orient_axis='X')
-    bpy.ops.transform.rotate(value=radians(-120), orient_axis='Z')
-    text_data = obj.data
-    # Set the content of the text data block
-    text_data.body = label    
-    text_data.size = 0.15
-    text = bpy.context.active_object
-    create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+    add_axis_label(label, (xlim[0] + 0.05, ylim[0] - 0.35, zlim[1] * 1.4), 0.15,
+                   Matrix.Rotation(radians(120), 3, 'Z') @ Matrix.Rotation(radians(90), 3, 'X'))
 
     
 
@@ -396,8 +504,18 @@ create_axis(axis='Z',
             zlim = zlim,
             label = "z[km]") 
 
+# Turn the collected axis geometry into one object per material
+create_axis_objects()
+
 set_title("Particle trajectory")
+
+# Join every label and the title into one text mesh
+create_label_objects()
      
 bpy.context.scene.cycles.tile_size = 256
 bpy.context.scene.cycles.samples = 200
 
+# Drop the cached materials that nothing uses any more
+purge_unused_materials()
+
+print("Materials: %d created, %d reused" % (material_stats["created"], material_stats["reused"]))
@@ -0,0 +1,97 @@
+# Compares the scalar color_map() the surface scripts used to call once per vertex against
+# the vectorized color_map_array() of blender_surface_plots.py that replaced it, on 1M values.
+# Runs outside Blender: only numpy is needed.
+import ast
+import os
+import time
+import numpy as np
+from numpy import exp
+
+min_z = -1.0
+max_z = 1.0
+
+def normalize_function_values_1(value):
+    normalized_data = (value - min_z) / (max_z - min_z)
+    return normalized_data
+
+def normalize_function_values_2(value):
+    normalized_data = 2*((value - min_z) / (max_z - min_z)) - 1
+    return normalized_data
+
+# Reference: the scalar function the surface scripts used before color_map_array(), kept only here
+def color_map(value, colormap, display_levels):
+    if (colormap == "Viridis" and display_levels == False):
+        value = normalize_function_values_2(value)
+        color = [0.9*exp(-((value - 1)**2)/0.08) + 0.6*exp(-((value - 0.4)**2)/0.12),
+        0.5*exp(-((value + 1)**2)/0.08) + 0.5*exp(-((value+0.5)**2)/0.2) + 0.6* exp(-((value )**2)/0.08) + 0.9*exp(-((value - 1)**2)/0.08) + 0.4*exp(-((value - 0.5)**2)/0.08), 
+        exp(-((value + 1)**2)/0.08)  + 0.8*exp(-((value+0.5)**2)/0.08)   + 0.5*exp(-((value)**2)/0.08 ), 1]
+    if (colormap == "90s" and display_levels == False):
+        value = normalize_function_values_2(value)
+        color = [0.9*exp(-((value-1)**2)/0.08) + 0.5*exp(-((value)**2)/0.02) +  0.55*exp(-((value-0.5)**2)/0.08),
+        0.99*exp(-((value)**2)/0.08) + 0.8* exp(-((value - 0.6)**2)/0.08) + 0.5* exp(-((value + 0.35)**2)/0.02), 
+        exp(-((value+0.5)**2)/0.08) + 0.5*exp(-((value)**2)/0.02), 1]
+    
+    # Jet colormap was adapted from Matplotlib: https://github.com/matplotlib/matplotlib/blob/main/lib/matplotlib/_cm.py
+    if (colormap == "Jet" and display_levels == False):
+        value = normalize_function_values_1(value)
+        if (value < 0.11):
+            color = [0,0,((1 - 0.5)/(0.11 - 0)) * value + (1 - ((1 - 0.5)/(0.11 - 0))*0.11),1]
+        elif (value < 0.125):
+            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]    
+        elif (value < 0.34):
+            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]   
+        elif (value < 0.35):
+              color = [0,
+              (value - 0.125) / (0.375 - 0.125),
+              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
+        elif (value < 0.375):
+              color = [(value - 0.35) / (0.66 - 0.35),
+              (value - 0.125) / (0.375 - 0.125),
+              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
+        elif (value < 0.64):
+              color = [(value - 0.35) / (0.66 - 0.35),
+              1,
+              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
+        elif (value < 0.90):
+              color = [1,
+              1 - (value - 0.64) / (0.91 - 0.64),
+              0,1]
+        else:
+              color = [ ((0.5 - 1.0)/(1 - 0.89)) * value + (0.5 - ((0.5 - 1.0)/(1 - 0.89)) *1.0),
+              0,
+              0,
+              1]
+    return color
+
+def load_functions(script, names, namespace):
+    # Compile the top-level functions 'names' of 'script' into 'namespace' straight from its
+    # source, so the shipped code is measured without running the rest of the script (which
+    # needs Blender)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in functions}
+    if missing:
+        raise LookupError("%s has no function %s" % (script, ", ".join(sorted(missing))))
+    exec(compile(ast.Module(body=functions, type_ignores=[]), path, "exec"), namespace)
+
+# The vectorized functions of blender_surface_plots.py, in a namespace of their own so they
+# cannot pick up the reference implementation above
+surface_plots = {"np": np, "exp": exp}
+load_functions("blender_surface_plots.py", ["normalize_function_values_1", "colormap_curves", "color_map_array"],
+               surface_plots)
+color_map_array = surface_plots["color_map_array"]
+
+values = np.random.default_rng(0).uniform(min_z, max_z, 10**6)
+
+print("%10s %12s %14s %10s %12s" % ("colormap", "scalar (s)", "vectorized (s)", "speedup", "max |diff|"))
+for colormap in ("Jet", "Viridis", "90s"):
+    start = time.perf_counter()
+    scalar_colors = np.array([color_map(value, colormap, False) for value in values], dtype=np.float32)
+    scalar_time = time.perf_counter() - start
+    start = time.perf_counter()
+    vector_colors = color_map_array(values, colormap, False, (min_z, max_z))
+    vector_time = time.perf_counter() - start
+    print("%10s %12.3f %14.4f %9.0fx %12.3g" % (colormap, scalar_time, vector_time, scalar_time/vector_time,
+                                              np.abs(scalar_colors - vector_colors).max()))
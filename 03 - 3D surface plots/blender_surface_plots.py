@@ -1,8 +1,9 @@
 import bpy
-from math import radians, sin, cos, ceil, floor
+from contextlib import contextmanager
+from math import sin, cos, ceil, floor
+import numpy as np
 from numpy import exp, pi
 from mathutils import Vector
-import bmesh
 
 ######## COLORMAP PROPERTIES ##################
 
@@ -29,102 +30,255 @@ colour_z_axis = (0.1, 0.1, 0.1, 1)
 XoY_color = (0.973, 0.973, 0.973, 1)
 YoZ_color = (0.961, 0.961, 0.961, 1)
 XoZ_color = (0.949, 0.949, 0.949, 1)
-
-bpy.ops.mesh.primitive_grid_add(x_subdivisions=120, y_subdivisions=120,  location=(1, 1, 0))
-bpy.ops.transform.resize(value=(1, 1, 1))
-
-bpy.ops.object.mode_set(mode='EDIT')
-
-obj = bpy.context.active_object
-mesh = obj.data
-
-bm = bmesh.from_edit_mesh(mesh)
-
-for v in bm.verts:
-    x = v.co.x
-    y = v.co.y
-    z = exp(-(x**2 + y**2) / 0.21) / (0.21 * pi)
-    v.co.z += z
-
-bmesh.update_edit_mesh(mesh)
-
-bpy.ops.object.mode_set(mode='OBJECT')
-
-def align_perpendicular_to_camera(object, camera):
-    view_vector = camera.matrix_world.to_quaternion() @ Vector((0, 0, 1))
-    object.rotation_euler = view_vector.to_track_quat('Z', 'Y').to_euler()
-    bpy.context.view_layer.update()
+# clip the plot limits to percentiles of noisy data (None uses the raw min/max)
+bounds_percentile = None
+
+def create_mesh_object(name, vertices, corner_vertices, face_sizes):
+    # Build a mesh straight from numpy arrays: (V,3) vertex coordinates, the vertex index of
+    # every face corner and the number of corners of every face. No operators are involved.
+    face_sizes = np.asarray(face_sizes, dtype=np.int32)
+    loop_start = np.zeros(len(face_sizes), dtype=np.int32)
+    np.cumsum(face_sizes[:-1], out=loop_start[1:])
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.loops.add(len(corner_vertices))
+    mesh.polygons.add(len(face_sizes))
+    mesh.vertices.foreach_set("co", np.asarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.asarray(corner_vertices, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    # Newer Blender versions derive the face sizes from loop_start
+    if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+    mesh.update(calc_edges=True)
+    obj = bpy.data.objects.new(name, mesh)
+    link_object(obj)
+    return obj
+
+def create_grid_object(name, x, y, location=(0, 0, 0)):
+    # Flat grid with a vertex at every (x[i], y[j]) and one quad per cell; x and y can have
+    # any length and any (also non-uniform) spacing
+    vertices = np.zeros((len(y), len(x), 3))
+    vertices[..., 0] = x
+    vertices[..., 1] = np.asarray(y)[:, None]
+    index = np.arange(len(x) * len(y)).reshape(len(y), len(x))
+    quads = np.stack([index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]], axis=-1)
+    obj = create_mesh_object(name, vertices.reshape(-1, 3), quads.ravel(), np.full((len(x) - 1) * (len(y) - 1), 4))
+    set_transform(obj, location=location)
+    return obj
+
+def write_heights(mesh, heights):
+    # Set the Z of every vertex to 'heights' (one value per vertex, in vertex order) with a
+    # single foreach_get/foreach_set pair, without entering edit mode
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    co[:, 2] = heights
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
+
+######## PLOT DATA ##################
+
+# 121 x 121 vertices (120 x 120 faces) spanning [-1, 1] on both axes, placed at grid_location
+grid_x = np.linspace(-1, 1, 121)
+grid_y = np.linspace(-1, 1, 121)
+grid_location = (1, 1, 0)
+
+def surface_function(x, y):
+    return exp(-(x**2 + y**2) / 0.21) / (0.21 * pi)
+
+# Heights over the grid, evaluated before anything is added to the scene
+grid_heights = surface_function(*np.meshgrid(grid_x, grid_y))
+
+def material_alive(material):
+    # False once the datablock has been removed from bpy.data
+    try:
+        material.name
+    except ReferenceError:
+        return False
+    return True
+
+# Number of material datablocks built and reused by this run
+material_stats = {"created": 0, "reused": 0}
+
+def get_material(name, build, key=()):
+    # Every material the script builds goes through this registry. A material is cached for the
+    # session under its name and 'key' (whatever build() bakes into it, such as a colour) and is
+    # only built, by build(material), when it is missing or was deleted. Every frame, every
+    # re-run of the script and the other plot scripts then share one datablock.
+    cache = session_cache("materials")
+    cache_key = (name,) + tuple(key)
+    material = cache.get(cache_key)
+    if material is None or not material_alive(material):
+        material = bpy.data.materials.new(name=name)
+        build(material)
+        cache[cache_key] = material
+        material_stats["created"] += 1
+    else:
+        material_stats["reused"] += 1
+    return material
 
 def create_diffuse_material(mesh, colour, name):
-    material = bpy.data.materials.new(name = name)
-    material.diffuse_color = colour
-    mesh.data.materials.append(material)
-
-def color_map(value, colormap, display_levels):
-    if (colormap == "Viridis" and display_levels == False):
-        value = normalize_function_values_2(value)
-        color = [0.9*exp(-((value - 1)**2)/0.08) + 0.6*exp(-((value - 0.4)**2)/0.12),
-        0.5*exp(-((value + 1)**2)/0.08) + 0.5*exp(-((value+0.5)**2)/0.2) + 0.6* exp(-((value )**2)/0.08) + 0.9*exp(-((value - 1)**2)/0.08) + 0.4*exp(-((value - 0.5)**2)/0.08), 
-        exp(-((value + 1)**2)/0.08)  + 0.8*exp(-((value+0.5)**2)/0.08)   + 0.5*exp(-((value)**2)/0.08 ), 1]
-    if (colormap == "90s" and display_levels == False):
-        value = normalize_function_values_2(value)
-        color = [0.9*exp(-((value-1)**2)/0.08) + 0.5*exp(-((value)**2)/0.02) +  0.55*exp(-((value-0.5)**2)/0.08),
-        0.99*exp(-((value)**2)/0.08) + 0.8* exp(-((value - 0.6)**2)/0.08) + 0.5* exp(-((value + 0.35)**2)/0.02), 
-        exp(-((value+0.5)**2)/0.08) + 0.5*exp(-((value)**2)/0.02), 1]
-    
-    # Jet colormap was adapted from Matplotlib: https://github.com/matplotlib/matplotlib/blob/main/lib/matplotlib/_cm.py
-    if (colormap == "Jet" and display_levels == False):
-        value = normalize_function_values_1(value)
-        if (value < 0.11):
-            color = [0,0,((1 - 0.5)/(0.11 - 0)) * value + (1 - ((1 - 0.5)/(0.11 - 0))*0.11),1]
-        elif (value < 0.125):
-            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]    
-        elif (value < 0.34):
-            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]   
-        elif (value < 0.35):
-              color = [0,
-              (value - 0.125) / (0.375 - 0.125),
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.375):
-              color = [(value - 0.35) / (0.66 - 0.35),
-              (value - 0.125) / (0.375 - 0.125),
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.64):
-              color = [(value - 0.35) / (0.66 - 0.35),
-              1,
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.90):
-              color = [1,
-              1 - (value - 0.64) / (0.91 - 0.64),
-              0,1]
-        else:
-              color = [ ((0.5 - 1.0)/(1 - 0.89)) * value + (0.5 - ((0.5 - 1.0)/(1 - 0.89)) *1.0),
-              0,
-              0,
-              1]
-    return color
-
-# Get the active object (which is the cube)
-cube = bpy.context.active_object
-# Get the mesh data
-mesh = cube.data
-
-# Find min and max coord of active object:
-# Get the object's world matrix
-world_matrix = cube.matrix_world
-
-# Initialize min and max coordinates
-min_coords = [float('inf'), float('inf'), float('inf')]
-max_coords = [float('-inf'), float('-inf'), float('-inf')]
-
-# Iterate through the vertices
-for vertex in cube.data.vertices:
-    vertex_world = world_matrix @ vertex.co
-
-    # Update min and max coordinates
-    for i in range(3):
-        min_coords[i] = min(min_coords[i], vertex_world[i])
-        max_coords[i] = max(max_coords[i], vertex_world[i])
+    # Objects with the same material name and colour share one material datablock
+    def build(material):
+        material.diffuse_color = colour
+    mesh.data.materials.append(get_material(name, build, tuple(colour)))
+
+def purge_unused_materials():
+    # Remove the registry's materials that no longer have any users
+    cache = session_cache("materials")
+    unused = [key for key, material in cache.items() if not material_alive(material) or material.users == 0]
+    bpy.data.batch_remove([cache[key] for key in unused if material_alive(cache[key])])
+    for key in unused:
+        del cache[key]
+    return len(unused)
+
+def compute_bounds(coords, percentile=None):
+    # Per-axis (mins, maxs) of an (N,3) array in a single reduction. 'percentile' clips
+    # noisy data to the [percentile, 100 - percentile] range instead of the raw extremes.
+    if percentile is None:
+        return coords.min(axis=0), coords.max(axis=0)
+    return np.percentile(coords, [percentile, 100 - percentile], axis=0)
+
+def colormap_curves(value, colormap):
+    # RGBA (N,4) of an array of values already normalized to [0, 1]. The curves and the
+    # order of the floating point operations are the same as in the original per-value
+    # color_map(), which benchmark_color_map.py keeps for comparison.
+    color = np.ones((len(value), 4))
+    if colormap == "Viridis":
+        value = 2*value - 1
+        color[:, 0] = 0.9*exp(-((value - 1)**2)/0.08) + 0.6*exp(-((value - 0.4)**2)/0.12)
+        color[:, 1] = 0.5*exp(-((value + 1)**2)/0.08) + 0.5*exp(-((value+0.5)**2)/0.2) + 0.6* exp(-((value )**2)/0.08) + 0.9*exp(-((value - 1)**2)/0.08) + 0.4*exp(-((value - 0.5)**2)/0.08)
+        color[:, 2] = exp(-((value + 1)**2)/0.08)  + 0.8*exp(-((value+0.5)**2)/0.08)   + 0.5*exp(-((value)**2)/0.08 )
+    elif colormap == "90s":
+        value = 2*value - 1
+        color[:, 0] = 0.9*exp(-((value-1)**2)/0.08) + 0.5*exp(-((value)**2)/0.02) +  0.55*exp(-((value-0.5)**2)/0.08)
+        color[:, 1] = 0.99*exp(-((value)**2)/0.08) + 0.8* exp(-((value - 0.6)**2)/0.08) + 0.5* exp(-((value + 0.35)**2)/0.02)
+        color[:, 2] = exp(-((value+0.5)**2)/0.08) + 0.5*exp(-((value)**2)/0.02)
+    elif colormap == "Jet":
+        # Same thresholds as the per-value color_map() if/elif chain: the first matching band wins
+        bands = [value < 0.11, value < 0.125, value < 0.34, value < 0.35, value < 0.375, value < 0.64, value < 0.90]
+        red_rise = (value - 0.35) / (0.66 - 0.35)
+        green_rise = (value - 0.125) / (0.375 - 0.125)
+        blue_fall = ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34)
+        color[:, 0] = np.select(bands, [0, 0, 0, 0, red_rise, red_rise, 1],
+                                ((0.5 - 1.0)/(1 - 0.89)) * value + (0.5 - ((0.5 - 1.0)/(1 - 0.89)) *1.0))
+        color[:, 1] = np.select(bands, [0, green_rise, green_rise, green_rise, green_rise, 1,
+                                        1 - (value - 0.64) / (0.91 - 0.64)], 0)
+        color[:, 2] = np.select(bands, [((1 - 0.5)/(0.11 - 0)) * value + (1 - ((1 - 0.5)/(0.11 - 0))*0.11),
+                                        1, 1, blue_fall, blue_fall, blue_fall, 0], 0)
+    else:
+        raise ValueError("Unknown colormap: %s" % colormap)
+    return color.astype(np.float32)
+
+def color_map_array(values, colormap, display_levels, zlim):
+    # RGBA (N,4) colours of a whole array of heights in one call, zlim[0] and zlim[1] being the
+    # two ends of the colormap
+    if display_levels:
+        raise ValueError("Contour levels are not supported by color_map_array")
+    values = np.asarray(values, dtype=np.float64)
+    return colormap_curves(normalize_function_values_1(values, zlim), colormap)
+
+# Open scene_construction() blocks, the object links and transforms they have queued, and
+# the view-layer updates they have avoided so far
+scene_construction_state = {"depth": 0, "links": [], "transforms": [], "avoided": 0}
+
+def link_object(obj, collection=None):
+    # Link 'obj' to 'collection' (the active collection by default) now, or when the
+    # enclosing scene_construction() block exits
+    collection = bpy.context.collection if collection is None else collection
+    if scene_construction_state["depth"]:
+        scene_construction_state["links"].append((collection, obj))
+    else:
+        collection.objects.link(obj)
+
+def apply_transform(obj, location=None, rotation=None, scale=None):
+    # Write the transform straight to location/rotation_euler/scale, without transform operators
+    if location is not None:
+        obj.location = location
+    if rotation is not None:
+        obj.rotation_euler = rotation
+    if scale is not None:
+        obj.scale = scale
+
+def set_transform(obj, location=None, rotation=None, scale=None):
+    # apply_transform() now, or when the enclosing scene_construction() block exits
+    if scene_construction_state["depth"]:
+        scene_construction_state["transforms"].append((obj, location, rotation, scale))
+    else:
+        apply_transform(obj, location, rotation, scale)
+
+@contextmanager
+def scene_construction():
+    # Scene construction block: the object links and transforms requested inside it are queued
+    # and applied when the outermost block exits, followed by exactly one view-layer update.
+    # Built with operators, every one of them evaluated the scene; the updates saved that way
+    # are added to scene_construction_state["avoided"].
+    state = scene_construction_state
+    state["depth"] += 1
+    try:
+        yield state
+    finally:
+        state["depth"] -= 1
+        if state["depth"] == 0:
+            links, transforms = state["links"], state["transforms"]
+            state["links"], state["transforms"] = [], []
+            for collection, obj in links:
+                collection.objects.link(obj)
+            for transform in transforms:
+                apply_transform(*transform)
+            bpy.context.view_layer.update()
+            state["avoided"] += max(len(links) + len(transforms) - 1, 0)
+
+def session_cache(name):
+    # Dictionary that outlives a single run of the script: it lives as long as the Blender session
+    return bpy.app.driver_namespace.setdefault(name, {})
+
+def loop_vertex_indices(mesh):
+    # Loop-to-vertex index array of a mesh, cached per session. A mesh that is rebuilt gets a
+    # new pointer or new vertex/loop/face counts, which invalidates its entry.
+    cache = session_cache("loop_vertex_indices")
+    key = (mesh.name_full, mesh.as_pointer())
+    counts = (len(mesh.vertices), len(mesh.loops), len(mesh.polygons))
+    if key not in cache or cache[key][0] != counts:
+        loop_vertices = np.empty(counts[1], dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vertices)
+        cache[key] = (counts, loop_vertices)
+    return cache[key][1]
+
+def write_vertex_colors(mesh, layer, vertex_colors):
+    # Expand the (N,4) per-vertex colours to every face corner with one gather
+    # and upload them with a single foreach_set
+    layer.data.foreach_set("color", vertex_colors[loop_vertex_indices(mesh)].ravel())
+
+def build_vertex_color_material(mat):
+    # Create a new node tree for the material
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+
+    # Clear default nodes
+    for node in nodes:
+        nodes.remove(node)
+
+    # Add a Vertex Color node
+    vc_node = nodes.new(type='ShaderNodeVertexColor')
+    vc_node.layer_name = 'Attribute'
+    vc_node.location = (0,0)  # Optional: Set the location of the node
+
+    # Add a Principled BSDF shader node
+    bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
+    bsdf_node.location = (400,0)  # Optional: Set the location of the node
+
+    # Add an Output node
+    output_node = nodes.new(type='ShaderNodeOutputMaterial')
+    output_node.location = (600,0)  # Optional: Set the location of the node
+
+    # Connect the nodes
+    mat.node_tree.links.new(vc_node.outputs["Color"], bsdf_node.inputs["Base Color"])
+    mat.node_tree.links.new(bsdf_node.outputs["BSDF"], output_node.inputs["Surface"])
+
+# Find min and max coord of the surface in world space:
+grid_coords = np.stack(np.meshgrid(grid_x, grid_y) + [grid_heights], axis=-1).reshape(-1, 3)
+min_coords, max_coords = compute_bounds(grid_coords + grid_location, bounds_percentile)
  
 # Calculate mins and maxes: 
 max_x = max_coords[0]
@@ -134,68 +288,10 @@ min_x = min_coords[0]
 min_y = min_coords[1]
 min_z = min_coords[2]
  
-# Switch to Vertex Paint mode
-bpy.ops.object.mode_set(mode='VERTEX_PAINT')
-
-# Set the active vertex color layer
-active_vc_layer = cube.data.vertex_colors.active
-if active_vc_layer is None:
-    active_vc_layer = cube.data.vertex_colors.new()
-
-def normalize_function_values_1(value):
-    normalized_data = (value - min_z) / (max_z - min_z)
+def normalize_function_values_1(value, zlim):
+    normalized_data = (value - zlim[0]) / (zlim[1] - zlim[0])
     return normalized_data
 
-def normalize_function_values_2(value):
-    normalized_data = 2*((value - min_z) / (max_z - min_z)) - 1
-    return normalized_data
-
-# Loop through the vertices and set them to red
-for poly in cube.data.polygons:
-    for loop_index in poly.loop_indices:
-        loop = cube.data.loops[loop_index]
-        vertex_index = loop.vertex_index
-        vert = mesh.vertices[vertex_index]
-        color = color_map(vert.co.z, colormap, display_levels)
-#            color = [4*abs(vert.co.z), 0, 0, 1]  # Red color (RGBA)
-#        else:
-#            color = [0, 0, 4*abs(vert.co.z), 1]  # Red color (RGBA)
-        active_vc_layer.data[loop_index].color = color
-
-# Create a new material
-mat = bpy.data.materials.new(name="Vertex Color Material")
-cube.data.materials.append(mat)
-
-# Get a reference to the material
-mat = cube.data.materials[0]
-
-# Create a new node tree for the material
-mat.use_nodes = True
-nodes = mat.node_tree.nodes
-
-# Clear default nodes
-for node in nodes:
-    nodes.remove(node)
-
-# Add a Vertex Color node
-vc_node = nodes.new(type='ShaderNodeVertexColor')
-vc_node.layer_name = 'Attribute'
-vc_node.location = (0,0)  # Optional: Set the location of the node
-
-# Add a Principled BSDF shader node
-bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-bsdf_node.location = (400,0)  # Optional: Set the location of the node
-
-# Add an Output node
-output_node = nodes.new(type='ShaderNodeOutputMaterial')
-output_node.location = (600,0)  # Optional: Set the location of the node
-
-# Connect the nodes
-mat.node_tree.links.new(vc_node.outputs["Color"], bsdf_node.inputs["Base Color"])
-mat.node_tree.links.new(bsdf_node.outputs["BSDF"], output_node.inputs["Surface"])
-
-bpy.ops.object.mode_set(mode='OBJECT')
-
 def set_white_background():
     bpy.context.scene.render.engine = 'CYCLES'
     bpy.context.scene.render.film_transparent = True
@@ -211,25 +307,174 @@ def set_white_background():
     # Set this thing to 1
     alpha_over_node.premul = 1
 
-def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label, XoY_color, YoZ_color, XoZ_color):
-    bpy.ops.mesh.primitive_cylinder_add(radius=1, depth=1)
-    bpy.ops.transform.resize(value=(thickness, thickness, thickness))
+def axis_frame(direction):
+    # Two unit vectors perpendicular to 'direction' and to each other, (u, v, direction) right-handed
+    w = np.asarray(direction, dtype=np.float64)
+    w = w / np.linalg.norm(w)
+    helper = np.array([0, 0, 1.0]) if abs(w[2]) < 0.999 else np.array([1.0, 0, 0])
+    u = np.cross(helper, w)
+    u /= np.linalg.norm(u)
+    return u, np.cross(w, u)
+
+def cylinder_geometry(start, end, radius, segments=32):
+    # Vertices and faces of a capped cylinder of 'radius' running from point 'start' to point 'end'
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    u, v = axis_frame(end - start)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + start, ring + end])
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    sides = np.stack([i, j, j + segments, i + segments], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1], i + segments])
+    face_sizes = np.concatenate([np.full(segments, 4), [segments, segments]])
+    return vertices, corner_vertices, face_sizes
+
+def cone_geometry(base, tip, radius, segments=32):
+    # Vertices and faces of a cone with a base of 'radius' centred on 'base' and its apex at 'tip'
+    base = np.asarray(base, dtype=np.float64)
+    u, v = axis_frame(np.asarray(tip, dtype=np.float64) - base)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + base, [tip]])
+    i = np.arange(segments)
+    sides = np.stack([i, (i + 1) % segments, np.full(segments, segments)], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1]])
+    face_sizes = np.concatenate([np.full(segments, 3), [segments]])
+    return vertices, corner_vertices, face_sizes
+
+def quad_geometry(centres, u, v):
+    # Vertices and faces of one rectangle per centre, spanning centre - u - v to centre + u + v.
+    # 'centres' is a single point or a (K,3) array of them.
+    centres = np.reshape(np.asarray(centres, dtype=np.float64), (-1, 3))
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) @ np.array([u, v], dtype=np.float64)
+    vertices = (centres[:, None, :] + corners).reshape(-1, 3)
+    return vertices, np.arange(len(vertices)), np.full(len(centres), 4)
+
+def points_along(x, y, z):
+    # (K,3) points from coordinates that are each a scalar or an array of length K
+    return np.column_stack(np.broadcast_arrays(x, y, z))
+
+def merge_geometry(parts):
+    # Concatenate (vertices, corner_vertices, face_sizes) parts into one, offsetting their indices
+    offsets = np.cumsum([0] + [len(vertices) for vertices, _, _ in parts[:-1]])
+    return (np.concatenate([vertices for vertices, _, _ in parts]),
+            np.concatenate([corners + offset for (_, corners, _), offset in zip(parts, offsets)]),
+            np.concatenate([sizes for _, _, sizes in parts]))
+
+# Axis, cone, grid line and plane geometry of the plot, grouped by (material name, colour)
+axis_geometry = {}
+
+def add_axis_geometry(material, colour, geometry):
+    axis_geometry.setdefault((material, tuple(colour)), []).append(geometry)
+
+def create_axis_objects():
+    # Build one mesh object per material out of everything create_axis() collected
+    objects = []
+    for (material, colour), parts in axis_geometry.items():
+        obj = create_mesh_object("axes." + material, *merge_geometry(parts))
+        create_diffuse_material(obj, colour, material)
+        objects.append(obj)
+    axis_geometry.clear()
+    return objects
+
+# Text of the tick labels, axis labels and title: (body, location, size, rotation) per label
+axis_labels = []
+
+def add_axis_label(body, location, size, rotation=None):
+    # 'rotation' is a 3x3 matrix; labels without one face the camera given to create_label_objects()
+    axis_labels.append((body, location, size, rotation))
+
+def camera_facing_rotation(camera):
+    # Rotation that turns text to face 'camera', as a matrix. It is read from matrix_basis,
+    # which follows camera.location and camera.rotation_euler as soon as the script sets them;
+    # matrix_world is only refreshed by the next depsgraph evaluation. The camera has no parent.
+    view_vector = camera.matrix_basis.to_quaternion() @ Vector((0, 0, 1))
+    return np.array(view_vector.to_track_quat('Z', 'Y').to_matrix())
+
+def mesh_geometry(mesh):
+    # (vertices, corner_vertices, face_sizes) of a mesh, read with foreach_get
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    corner_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_vertices)
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", face_sizes)
+    return vertices.reshape(-1, 3), corner_vertices, face_sizes
+
+def convert_font_curves(texts, font=None):
+    # Mesh geometry of unit-size text for every string in 'texts', converted from temporary font
+    # curves after a single depsgraph evaluation
+    curves = []
+    objects = []
+    for body in texts:
+        curve = bpy.data.curves.new("label", type='FONT')
+        curve.body = body
+        if font is not None:
+            curve.font = font
+        obj = bpy.data.objects.new("label", curve)
+        bpy.context.scene.collection.objects.link(obj)
+        curves.append(curve)
+        objects.append(obj)
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    meshes = [bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph)) for obj in objects]
+    geometry = [mesh_geometry(mesh) for mesh in meshes]
+    bpy.data.batch_remove(objects + curves + meshes)
+    return geometry
+
+def glyph_atlas(characters, font=None):
+    # Unit-size geometry and advance of every character of a font, kept for the whole session.
+    # Only characters that are not in the atlas yet are converted, all in one pass. The advance
+    # of a character is how far it pushes a following "|": the width of "|c|" minus that of "||".
+    glyphs = session_cache("label_glyphs").setdefault(None if font is None else font.name_full, {})
+    missing = sorted(set(characters) - set(glyphs))
+    if missing:
+        geometry = convert_font_curves(["||"] + missing + ["|%s|" % c for c in missing], font)
+        bars_width = geometry[0][0][:, 0].max()
+        for n, c in enumerate(missing):
+            framed_width = geometry[1 + len(missing) + n][0][:, 0].max()
+            glyphs[c] = geometry[1 + n] + (framed_width - bars_width,)
+    return glyphs
+
+def label_geometry(body, glyphs):
+    # Unit-size geometry of one line of text, laid out from the atlas glyphs
+    parts = []
+    x = 0.0
+    for c in body:
+        vertices, corner_vertices, face_sizes, advance = glyphs[c]
+        parts.append((vertices + (x, 0, 0), corner_vertices, face_sizes))
+        x += advance
+    return merge_geometry(parts)
+
+def create_label_objects(camera=None, font=None):
+    # Turn every collected label into one joined text mesh, assembled from the glyph atlas so
+    # only characters never used before in this session go through a font curve. The camera
+    # rotation is read once and shared by all the labels that face it (without a camera they
+    # lie in XoY).
+    labels = [label for label in axis_labels if label[0]]
+    axis_labels.clear()
+    if not labels:
+        return None
+    facing = np.eye(3) if camera is None else camera_facing_rotation(camera)
+    glyphs = glyph_atlas("".join(body for body, _, _, _ in labels), font)
+    parts = []
+    for body, location, size, rotation in labels:
+        vertices, corner_vertices, face_sizes = label_geometry(body, glyphs)
+        rotation = facing if rotation is None else np.asarray(rotation)
+        parts.append(((size*vertices) @ rotation.T + location, corner_vertices, face_sizes))
+    obj = create_mesh_object("axes.labels", *merge_geometry(parts))
+    create_diffuse_material(obj, (0, 0, 0, 1), "text_material")
+    return obj
 
+def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label, XoY_color, YoZ_color, XoZ_color):
     if (axis == 'X'):
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Y')
-        bpy.ops.transform.resize(value=((xlim[1]-xlim[0])/thickness, 1, 1))
-        bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0], zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")  
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=3)
-        bpy.ops.transform.rotate(value=-radians(90), orient_axis='Y')
-        bpy.ops.transform.translate(value=(xlim[1], ylim[0], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the X range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[1], ylim[0], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[1] - 4.5*thickness, ylim[0], zlim[0]),
+                                        (xlim[1] + 4.5*thickness, ylim[0], zlim[0]), 3*thickness))
 
         # Round off x coords used for text and grid lines:
         if (xlim[0] > 0):
@@ -247,71 +492,33 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xmin + xstep*N + 0.02
-                obj.location.y = ylim[1] + 0.05
-                obj.location.z = zlim[0] - 0.1
-                text_data = obj.data
-                text_data.body = str(round((xmin + xstep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((xmin + xstep*N)*10)/10), (xmin + xstep*N + 0.02, ylim[1] + 0.05, zlim[0] - 0.1), 0.12)
                 
         # Create 'xlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = 0.5*(xlim[1]+xlim[0]) * (0.95 + len(label)/10)
-        obj.location.y = ylim[1] + 0.05
-        obj.location.z = zlim[0] - 0.3
-        text_data = obj.data
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (0.5*(xlim[1]+xlim[0]) * (0.95 + len(label)/10), ylim[1] + 0.05, zlim[0] - 0.3), 0.13)
         
         
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xmin + xstep*N, ylim[0], (zlim[1]+zlim[0])*0.5 )) # anchor point
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                               
-            for N in range(1,5):
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xmin + xstep*N, (ylim[1]+ylim[0])*0.5, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-            
-            # Add the plane XoY:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], ylim[1]-ylim[0], 1))                
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, XoY_color, "plane_material")
+            # Lines up the XoZ plane and across the XoY plane at every tick, then the XoY plane
+            x = xmin + xstep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, ylim[0], 0.5*(zlim[1]+zlim[0])),
+                                            (0.25*thickness, 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, 0.5*(ylim[1]+ylim[0]), zlim[0]),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", XoY_color,
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
                             
     elif (axis == 'Y'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.resize(value=(1, (ylim[1]-ylim[0])/thickness, 1))
-        bpy.ops.transform.translate(value=(xlim[0], 0.5*(ylim[1]+ylim[0]), zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.translate(value=(xlim[0], ylim[1], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")   
+        # Axis along the Y range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[1], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[1] - 3*thickness, zlim[0]),
+                                        (xlim[0], ylim[1] + 3*thickness, zlim[0]), 3*thickness))
 
         # Round off y coords used for text and grid lines:
         if (ylim[0] > 0):
@@ -329,71 +536,32 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the Y-axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[1] + 0.02
-                obj.location.y = ymin + ystep*N - 0.2
-                obj.location.z = zlim[0] - 0.2
-                text_data = obj.data
-                text_data.body = str(round((ymin + ystep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((ymin + ystep*N)*10)/10), (xlim[1] + 0.02, ymin + ystep*N - 0.2, zlim[0] - 0.2), 0.12)
                 
         # Create 'ylabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[1] + 0.07
-        obj.location.y = 0.5*(ylim[1]+ylim[0]) - 0.3
-        obj.location.z = zlim[0] - 0.4
-        text_data = obj.data
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
+        add_axis_label(label, (xlim[1] + 0.07, 0.5*(ylim[1]+ylim[0]) - 0.3, zlim[0] - 0.4), 0.13)
             
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # Add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xlim[0], ymin + ystep*N, (zlim[1]+zlim[0])*0.5))
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                
-            for N in range(1,5): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))                
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ymin + ystep*N, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-           
-            # Add the plane YoZ:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(zlim[1]-zlim[0], ylim[1]-ylim[0], 1))    
-            bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)              
-            bpy.ops.transform.translate(value=(xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, YoZ_color, "plane_material")   
+            # Lines up the YoZ plane and across the XoY plane at every tick, then the YoZ plane
+            y = ymin + ystep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], y, 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.25*thickness, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), y, zlim[0]),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("plane_material", YoZ_color,
+                              quad_geometry((xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.5*(ylim[1]-ylim[0]), 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
                  
     elif (axis == 'Z'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Z')
-        bpy.ops.transform.resize(value=(1, 1, (zlim[1]-zlim[0])/thickness))
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], 0.5*(zlim[1]+zlim[0])))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], zlim[1]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the Z range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[0], zlim[1]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[0], zlim[1] - 3*thickness),
+                                        (xlim[0], ylim[0], zlim[1] + 3*thickness), 3*thickness))
 
         # Round off z coords used for text and grid lines:
         if (zlim[0] > 0):
@@ -411,131 +579,169 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[1] + 0.05
-                obj.location.y = ylim[0] - 0.3
-                obj.location.z = zmin + zstep*N - 0.10
-                text_data = obj.data
-                text_data.body = str(round((zmin + zstep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((zmin + zstep*N)*10)/10), (xlim[1] + 0.05, ylim[0] - 0.3, zmin + zstep*N - 0.10), 0.12)
             
         # Create 'zlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[1] + 0.05
-        obj.location.y = ylim[0]  - 0.7*(0.8 + len(label)/10)
-        obj.location.z = 0.5*(zlim[1] + zlim[0]) * 1.1
-        text_data = obj.data
-        text_data.body = label    
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (xlim[1] + 0.05, ylim[0]  - 0.7*(0.8 + len(label)/10), 0.5*(zlim[1] + zlim[0]) * 1.1), 0.13)
                           
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,4): #add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ylim[0], zmin + zstep*N)) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                                    
-            for N in range(1,4): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xlim[0], (ylim[1]+ylim[0])*0.5, zmin + zstep*N))  
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")                            
-            
-            #add the XoZ plane:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], zlim[1]-zlim[0], 1))  
-            bpy.ops.transform.rotate(value=radians(90), orient_axis='X')              
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, XoZ_color, "plane_material")   
-
-def set_title(label):
-    bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-    obj = bpy.context.active_object
-    obj.location.x = xlim[0] + 0.05
-    obj.location.y = ylim[0] - 0.35
-    obj.location.z = zlim[1] * 1.3
-    text_data = obj.data
-    text_data.body = label    
-    text_data.size = 0.15
-    text = bpy.context.active_object
-    align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-    create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+            # Flat lines along the back edges of the XoY plane at every tick, then the XoZ plane
+            z = zmin + zstep*np.arange(1, 4)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), ylim[0], z),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], 0.5*(ylim[1]+ylim[0]), z),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", XoZ_color,
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+
+def set_title(label, limits):
+    xlim, ylim, zlim = limits
+    add_axis_label(label, (xlim[0] + 0.05, ylim[0] - 0.35, zlim[1] * 1.3), 0.15)
 
     
 
 
-# Set ambient light colour
-bpy.data.worlds["World"].node_tree.nodes["Background"].inputs[0].default_value = (0.80, 0.80, 0.80, 1)
+def same_inputs(a, b):
+    # Deep comparison of plot spec values: dicts, sequences, numpy arrays and plain values
+    if isinstance(a, dict) or isinstance(b, dict):
+        return (isinstance(a, dict) and isinstance(b, dict) and a.keys() == b.keys()
+                and all(same_inputs(a[key], b[key]) for key in a))
+    if isinstance(a, (np.ndarray, list, tuple)) or isinstance(b, (np.ndarray, list, tuple)):
+        return np.shape(a) == np.shape(b) and np.array_equal(a, b)
+    return a == b
+
+def remove_objects(names):
+    # Remove the named objects that still exist, together with their meshes, in one batch
+    objects = [bpy.data.objects[name] for name in names if name in bpy.data.objects]
+    meshes = {obj.data for obj in objects if obj.type == 'MESH'}
+    bpy.data.batch_remove(objects + list(meshes))
+
+def rebuild_plot(name, spec, builders, depends=None):
+    # Build only the components of 'spec' whose inputs differ from the last build of the plot
+    # 'name' in this session, whose objects have been deleted since, or that depend on a
+    # component rebuilt now. builders[component](spec, objects) gets the whole spec and the
+    # objects of every component built so far, and returns the objects it owns; those are
+    # removed before the component is built again. Returns the rebuilt components.
+    depends = depends or {}
+    state = session_cache("plot_specs").setdefault(name, {"spec": {}, "objects": {}})
+    rebuilt = []
+    for component, inputs in spec.items():
+        owned = state["objects"].get(component, [])
+        if (component in state["spec"] and same_inputs(inputs, state["spec"][component])
+                and all(object_name in bpy.data.objects for object_name in owned)
+                and not any(dependency in rebuilt for dependency in depends.get(component, ()))):
+            continue
+        remove_objects(owned)
+        state["objects"][component] = [obj.name for obj in builders[component](spec, state["objects"])]
+        state["spec"][component] = inputs
+        rebuilt.append(component)
+    return rebuilt
+
+def build_render(spec, objects):
+    render = spec["render"]
+    # Set ambient light colour
+    bpy.data.worlds["World"].node_tree.nodes["Background"].inputs[0].default_value = render["background"]
+    set_white_background()
+    bpy.context.scene.cycles.tile_size = render["tile_size"]
+    bpy.context.scene.cycles.samples = render["samples"]
+    return []
+
+def build_grid(spec, objects):
+    grid = spec["grid"]
+    return [create_grid_object("Grid", grid["x"], grid["y"], location=grid["location"])]
+
+def build_surface(spec, objects):
+    # Heights, vertex colours and material of the grid object, written in place
+    surface = spec["surface"]
+    mesh = bpy.data.objects[objects["grid"][0]].data
+    # The grid vertices are in np.meshgrid(x, y) order, so the raveled heights line up with them
+    write_heights(mesh, surface["heights"].ravel())
+    # Set the active vertex color layer
+    active_vc_layer = mesh.vertex_colors.active
+    if active_vc_layer is None:
+        active_vc_layer = mesh.vertex_colors.new()
+    # Colour every vertex in one call
+    vertex_colors = color_map_array(surface["heights"].ravel(), surface["colormap"], surface["display_levels"],
+                                    surface["zlim"])
+    write_vertex_colors(mesh, active_vc_layer, vertex_colors)
+    # Use the shared vertex colour material
+    mat = get_material("Vertex Color Material", build_vertex_color_material)
+    if mat.name not in mesh.materials:
+        mesh.materials.append(mat)
+    return []
+
+def build_camera(spec, objects):
+    # set the camera position and direction
+    xlim, ylim, zlim = spec["camera"]["limits"]
+    camera = bpy.data.objects.get("Camera")
+    camera.rotation_euler = (1.1938, 0, 2.1258)
+    camera.location.x = (zlim[1] - zlim[0])*1*13.8926 * cos(camera.rotation_euler.x) + (xlim[0] + xlim[1])/2
+    camera.location.y = (zlim[1] - zlim[0])*1*9.7476 * cos(camera.rotation_euler.x) + (ylim[0] + ylim[1])/2
+    camera.location.z = (zlim[1] - zlim[0])*1*6.336805 * cos(camera.rotation_euler.x) + (zlim[0] + zlim[1])/2
+    return []
+
+def collect_axes(spec, component):
+    # Queue the geometry and the labels of the three axes, placed at the limits of
+    # spec[component]. The axes and the labels are separate components: each of their builders
+    # turns its own half into objects and drops the other.
+    axes = spec["axes"]
+    labels = spec["labels"]
+    xlim, ylim, zlim = spec[component]["limits"]
+    for n, axis in enumerate("XYZ"):
+        create_axis(axis, axes["colour"][n], axes["thickness"][n], axes["display_grid"], labels["display_tick"],
+                    xlim, ylim, zlim, labels["text"][n], *axes["planes"])
+
+def build_axes(spec, objects):
+    collect_axes(spec, "axes")
+    axis_labels.clear()
+    # Turn the collected axis geometry into one object per material
+    return create_axis_objects()
+
+def build_labels(spec, objects):
+    collect_axes(spec, "labels")
+    axis_geometry.clear()
+    set_title(spec["labels"]["title"], spec["labels"]["limits"])
+    # Join every label and the title into one text mesh
+    obj = create_label_objects(bpy.data.objects.get("Camera"))
+    return [] if obj is None else [obj]
 
 # Calculate min, max limits of the current plot
 xlim = (min_x, max_x)
 ylim = (min_y, max_y)
 zlim = (min_z, max_z)
 
-# set the camera position and direction
-camera = bpy.data.objects.get("Camera")
-camera.rotation_euler = (1.1938, 0, 2.1258)
-camera.location.x = (zlim[1] - zlim[0])*1*13.8926 * cos(camera.rotation_euler.x) + (xlim[0] + xlim[1])/2
-camera.location.y = (zlim[1] - zlim[0])*1*9.7476 * cos(camera.rotation_euler.x) + (ylim[0] + ylim[1])/2
-camera.location.z = (zlim[1] - zlim[0])*1*6.336805 * cos(camera.rotation_euler.x) + (zlim[0] + zlim[1])/2
-
-set_white_background()
-
-
-create_axis('X', 
-            colour_x_axis, 
-            thickness_x_axis, 
-            display_grid,
-            display_tick, 
-            xlim, 
-            ylim, 
-            zlim,
-            label_x_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-create_axis('Y', 
-            colour_y_axis, 
-            thickness_y_axis, 
-            display_grid,
-            display_tick,  
-            xlim, 
-            ylim, 
-            zlim,
-            label_y_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-create_axis('Z', 
-            colour_z_axis, 
-            thickness_z_axis, 
-            display_grid,
-            display_tick, 
-            xlim, 
-            ylim, 
-            zlim,
-            label_z_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-set_title(title_plot)
-     
-bpy.context.scene.cycles.tile_size = 256
-bpy.context.scene.cycles.samples = 200
-
-
+# Everything the plot is built from. Running the script again in the same session only
+# rebuilds the components whose inputs changed, e.g. a new title only replaces the labels.
+plot_spec = {
+    "render": {"background": (0.80, 0.80, 0.80, 1), "tile_size": 256, "samples": 200},
+    "grid": {"x": grid_x, "y": grid_y, "location": grid_location},
+    "surface": {"heights": grid_heights, "colormap": colormap, "display_levels": display_levels, "zlim": zlim},
+    "camera": {"limits": (xlim, ylim, zlim)},
+    "axes": {"limits": (xlim, ylim, zlim),
+             "colour": (colour_x_axis, colour_y_axis, colour_z_axis),
+             "thickness": (thickness_x_axis, thickness_y_axis, thickness_z_axis),
+             "planes": (XoY_color, YoZ_color, XoZ_color),
+             "display_grid": display_grid},
+    "labels": {"limits": (xlim, ylim, zlim),
+               "title": title_plot,
+               "text": (label_x_axis, label_y_axis, label_z_axis),
+               "display_tick": display_tick},
+}
+
+# Object links and transforms wait for a single view-layer update at the end
+with scene_construction():
+    rebuilt = rebuild_plot("surface_plot", plot_spec,
+                           {"render": build_render, "grid": build_grid, "surface": build_surface,
+                            "camera": build_camera, "axes": build_axes, "labels": build_labels},
+                           depends={"surface": ("grid",), "labels": ("camera",)})
+
+# Drop the cached materials that nothing uses any more
+purge_unused_materials()
+
+print("Rebuilt: %s" % (", ".join(rebuilt) or "nothing"))
+print("Materials: %d created, %d reused" % (material_stats["created"], material_stats["reused"]))
+print("Scene construction: %d view-layer updates avoided" % scene_construction_state["avoided"])
@@ -0,0 +1,134 @@
+# Runs create_grid_object() and create_mesh_object() of the surface scripts against a stand-in
+# for bpy and checks the mesh they build: vertex and loop counts, the corner order of every
+# quad and the (non-uniform) x/y spacing, and that inside scene_construction() the object is
+# linked and placed only when the block exits, with one view-layer update. Runs outside
+# Blender: only numpy is needed.
+import ast
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+import numpy as np
+
+def load_functions(script, names, namespace):
+    # Compile the top-level functions 'names' of 'script' into 'namespace' straight from its
+    # source, so the shipped code is checked without running the rest of the script (which
+    # needs Blender)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in functions}
+    if missing:
+        raise LookupError("%s has no function %s" % (script, ", ".join(sorted(missing))))
+    exec(compile(ast.Module(body=functions, type_ignores=[]), path, "exec"), namespace)
+
+class Collection:
+    # Behaves like a bpy mesh collection for add() and foreach_set(): every attribute is a flat
+    # buffer and foreach_set must be given exactly one value per item and component
+    def __init__(self, components, readonly=()):
+        self.components = components
+        self.values = {}
+        self.count = 0
+        self.bl_rna = SimpleNamespace(properties={name: SimpleNamespace(is_readonly=name in readonly)
+                                                  for name in components})
+
+    def __len__(self):
+        return self.count
+
+    def add(self, count):
+        self.count += count
+
+    def foreach_set(self, attribute, values):
+        values = np.asarray(values)
+        assert values.ndim == 1 and len(values) == self.count * self.components[attribute], attribute
+        self.values[attribute] = values.reshape(self.count, -1).copy()
+
+class Mesh:
+    def __init__(self, name, loop_total_readonly):
+        self.name = name
+        self.vertices = Collection({"co": 3})
+        self.loops = Collection({"vertex_index": 1})
+        self.polygons = Collection({"loop_start": 1, "loop_total": 1},
+                                   readonly=("loop_total",) if loop_total_readonly else ())
+        self.updated = False
+
+    def update(self, calc_edges=False):
+        self.updated = True
+
+def fake_bpy(loop_total_readonly):
+    linked = []
+    meshes = SimpleNamespace(new=lambda name: Mesh(name, loop_total_readonly))
+    objects = SimpleNamespace(new=lambda name, data: SimpleNamespace(name=name, data=data, location=(0, 0, 0)))
+    collection = SimpleNamespace(objects=SimpleNamespace(link=linked.append))
+    view_layer = SimpleNamespace(updates=0)
+    view_layer.update = lambda: setattr(view_layer, "updates", view_layer.updates + 1)
+    return SimpleNamespace(data=SimpleNamespace(meshes=meshes, objects=objects),
+                           context=SimpleNamespace(collection=collection, view_layer=view_layer)), linked
+
+# Non-uniform spacing on both axes and different resolutions, so x and y cannot be swapped
+x = np.array([-1.0, -0.7, -0.2, 0.0, 0.05, 0.5, 1.0])
+y = np.array([-2.0, -1.0, -0.5, -0.25, 3.0])
+scripts = ["blender_surface_plots.py", "../04 - 3D animated surface plots/animated_contour_plots.py"]
+functions = ["create_mesh_object", "create_grid_object", "link_object", "apply_transform", "set_transform",
+             "scene_construction"]
+
+def script_namespace(script, bpy):
+    namespace = {"np": np, "bpy": bpy, "contextmanager": contextmanager,
+                 "scene_construction_state": {"depth": 0, "links": [], "transforms": [], "avoided": 0}}
+    load_functions(script, functions, namespace)
+    return namespace
+
+for script in scripts:
+    for loop_total_readonly in (False, True):
+        bpy, linked = fake_bpy(loop_total_readonly)
+        namespace = script_namespace(script, bpy)
+        obj = namespace["create_grid_object"]("Grid", x, y, location=(1, 2, 3))
+        mesh = obj.data
+        assert linked == [obj] and obj.location == (1, 2, 3) and mesh.updated
+        assert bpy.context.view_layer.updates == 0
+
+        # One vertex per (x[i], y[j]), x varying fastest, as np.meshgrid(x, y) ravels
+        assert len(mesh.vertices) == len(x) * len(y)
+        co = mesh.vertices.values["co"]
+        grid_x, grid_y = np.meshgrid(x, y)
+        assert np.array_equal(co[:, 0], grid_x.ravel().astype(np.float32))
+        assert np.array_equal(co[:, 1], grid_y.ravel().astype(np.float32))
+        assert np.all(co[:, 2] == 0)
+
+        # One quad per cell, 4 loops each
+        cells = (len(x) - 1) * (len(y) - 1)
+        assert len(mesh.polygons) == cells
+        assert len(mesh.loops) == 4 * cells
+        assert np.array_equal(mesh.polygons.values["loop_start"].ravel(), 4 * np.arange(cells))
+        if loop_total_readonly:
+            assert "loop_total" not in mesh.polygons.values
+        else:
+            assert np.all(mesh.polygons.values["loop_total"] == 4)
+
+        # Corners of cell (i, j) go (i, j), (i+1, j), (i+1, j+1), (i, j+1): counter-clockwise
+        # seen from +Z, so every face normal points up
+        quads = mesh.loops.values["vertex_index"].reshape(-1, 4)
+        assert list(quads[0]) == [0, 1, len(x) + 1, len(x)]
+        corners = co[quads][..., :2]
+        area = 0.5 * np.sum(corners[:, :, 0] * np.roll(corners[:, :, 1], -1, axis=1)
+                            - np.roll(corners[:, :, 0], -1, axis=1) * corners[:, :, 1], axis=1)
+        cell_area = np.outer(np.diff(y), np.diff(x)).ravel()
+        assert np.allclose(area, cell_area)
+    print("%s: %d vertices, %d quads, %d loops" % (os.path.basename(script), len(mesh.vertices),
+                                                    len(mesh.polygons), len(mesh.loops)))
+
+    # Inside nested scene_construction() blocks the grids are linked and placed only when the
+    # outermost block exits, followed by a single view-layer update
+    bpy, linked = fake_bpy(False)
+    namespace = script_namespace(script, bpy)
+    with namespace["scene_construction"]():
+        grids = [namespace["create_grid_object"]("Grid", x, y, location=(i, 0, 0)) for i in range(3)]
+        with namespace["scene_construction"]():
+            grids.append(namespace["create_grid_object"]("Grid", x, y, location=(3, 0, 0)))
+        assert linked == [] and all(grid.location == (0, 0, 0) for grid in grids)
+    assert linked == grids and [grid.location for grid in grids] == [(i, 0, 0) for i in range(4)]
+    assert bpy.context.view_layer.updates == 1
+    state = namespace["scene_construction_state"]
+    assert state["depth"] == 0 and state["links"] == state["transforms"] == [] and state["avoided"] == 7
+    print("  4 grids built in one block: 1 view-layer update, %d avoided" % state["avoided"])
+print("All checks passed")
@@ -1,8 +1,12 @@
 import bpy
-from math import radians, sin, cos, ceil, floor
+from contextlib import contextmanager
+from math import cos, ceil, floor
+import os
+import hashlib
+import types
+import numpy as np
 from numpy import exp, pi, arange
 from mathutils import Vector
-import bmesh
 
 ######## REDER PROPERTIES #####################
 
@@ -10,6 +14,9 @@ bpy.context.scene.cycles.tile_size = 256
 bpy.context.scene.render.engine = 'CYCLES'; 
 bpy.context.scene.cycles.samples = 2; 
 bpy.context.scene.cycles.use_denoising = True
+# "frames": update the mesh from Python and render every step as a still image
+# "shape_keys": bake every step into shape keys and render the whole sequence with one animation render
+animation_mode = "frames"
 
 ######## COLORMAP PROPERTIES ##################
 
@@ -17,6 +24,8 @@ bpy.context.scene.cycles.use_denoising = True
 colormap = "Jet"
 # display contour plot levels
 display_levels = False
+# number of entries of the cached colormap lookup table (e.g. 256, 1024, 4096)
+colormap_resolution = 1024
 
 ######## AXIS PROPERTIES ##################
 
@@ -48,67 +57,411 @@ min_x = xlim[0]
 min_y = ylim[0]
 min_z = zlim[0]
  
-def align_perpendicular_to_camera(object, camera):
-    view_vector = camera.matrix_world.to_quaternion() @ Vector((0, 0, 1))
-    object.rotation_euler = view_vector.to_track_quat('Z', 'Y').to_euler()
-    bpy.context.view_layer.update()
+def material_alive(material):
+    # False once the datablock has been removed from bpy.data
+    try:
+        material.name
+    except ReferenceError:
+        return False
+    return True
+
+# Number of material datablocks built and reused by this run
+material_stats = {"created": 0, "reused": 0}
+
+def get_material(name, build, key=()):
+    # Every material the script builds goes through this registry. A material is cached for the
+    # session under its name and 'key' (whatever build() bakes into it, such as a colour) and is
+    # only built, by build(material), when it is missing or was deleted. Every frame, every
+    # re-run of the script and the other plot scripts then share one datablock.
+    cache = session_cache("materials")
+    cache_key = (name,) + tuple(key)
+    material = cache.get(cache_key)
+    if material is None or not material_alive(material):
+        material = bpy.data.materials.new(name=name)
+        build(material)
+        cache[cache_key] = material
+        material_stats["created"] += 1
+    else:
+        material_stats["reused"] += 1
+    return material
 
 def create_diffuse_material(mesh, colour, name):
-    material = bpy.data.materials.new(name = name)
-    material.diffuse_color = colour
-    mesh.data.materials.append(material)
+    # Objects with the same material name and colour share one material datablock
+    def build(material):
+        material.diffuse_color = colour
+    mesh.data.materials.append(get_material(name, build, tuple(colour)))
+
+def purge_unused_materials():
+    # Remove the registry's materials that no longer have any users
+    cache = session_cache("materials")
+    unused = [key for key, material in cache.items() if not material_alive(material) or material.users == 0]
+    bpy.data.batch_remove([cache[key] for key in unused if material_alive(cache[key])])
+    for key in unused:
+        del cache[key]
+    return len(unused)
 
 def normalize_function_values_1(value):
     normalized_data = (value - min_z) / (max_z - min_z)
     return normalized_data
 
-def normalize_function_values_2(value):
-    normalized_data = 2*((value - min_z) / (max_z - min_z)) - 1
-    return normalized_data
-
-def color_map(value, colormap, display_levels):
-    if (colormap == "Viridis" and display_levels == False):
-        value = normalize_function_values_2(value)
-        color = [0.9*exp(-((value - 1)**2)/0.08) + 0.6*exp(-((value - 0.4)**2)/0.12),
-        0.5*exp(-((value + 1)**2)/0.08) + 0.5*exp(-((value+0.5)**2)/0.2) + 0.6* exp(-((value )**2)/0.08) + 0.9*exp(-((value - 1)**2)/0.08) + 0.4*exp(-((value - 0.5)**2)/0.08), 
-        exp(-((value + 1)**2)/0.08)  + 0.8*exp(-((value+0.5)**2)/0.08)   + 0.5*exp(-((value)**2)/0.08 ), 1]
-    if (colormap == "90s" and display_levels == False):
-        value = normalize_function_values_2(value)
-        color = [0.9*exp(-((value-1)**2)/0.08) + 0.5*exp(-((value)**2)/0.02) +  0.55*exp(-((value-0.5)**2)/0.08),
-        0.99*exp(-((value)**2)/0.08) + 0.8* exp(-((value - 0.6)**2)/0.08) + 0.5* exp(-((value + 0.35)**2)/0.02), 
-        exp(-((value+0.5)**2)/0.08) + 0.5*exp(-((value)**2)/0.02), 1]
-    
-    # Jet colormap was adapted from Matplotlib: https://github.com/matplotlib/matplotlib/blob/main/lib/matplotlib/_cm.py
-    if (colormap == "Jet" and display_levels == False):
-        value = normalize_function_values_1(value)
-        if (value < 0.11):
-            color = [0,0,((1 - 0.5)/(0.11 - 0)) * value + (1 - ((1 - 0.5)/(0.11 - 0))*0.11),1]
-        elif (value < 0.125):
-            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]    
-        elif (value < 0.34):
-            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]   
-        elif (value < 0.35):
-              color = [0,
-              (value - 0.125) / (0.375 - 0.125),
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.375):
-              color = [(value - 0.35) / (0.66 - 0.35),
-              (value - 0.125) / (0.375 - 0.125),
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.64):
-              color = [(value - 0.35) / (0.66 - 0.35),
-              1,
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.90):
-              color = [1,
-              1 - (value - 0.64) / (0.91 - 0.64),
-              0,1]
+def colormap_curves(value, colormap):
+    # RGBA (N,4) of an array of values already normalized to [0, 1]. The curves and the
+    # order of the floating point operations are the same as in the original per-value
+    # color_map(), which benchmark_color_map.py keeps for comparison.
+    color = np.ones((len(value), 4))
+    if colormap == "Viridis":
+        value = 2*value - 1
+        color[:, 0] = 0.9*exp(-((value - 1)**2)/0.08) + 0.6*exp(-((value - 0.4)**2)/0.12)
+        color[:, 1] = 0.5*exp(-((value + 1)**2)/0.08) + 0.5*exp(-((value+0.5)**2)/0.2) + 0.6* exp(-((value )**2)/0.08) + 0.9*exp(-((value - 1)**2)/0.08) + 0.4*exp(-((value - 0.5)**2)/0.08)
+        color[:, 2] = exp(-((value + 1)**2)/0.08)  + 0.8*exp(-((value+0.5)**2)/0.08)   + 0.5*exp(-((value)**2)/0.08 )
+    elif colormap == "90s":
+        value = 2*value - 1
+        color[:, 0] = 0.9*exp(-((value-1)**2)/0.08) + 0.5*exp(-((value)**2)/0.02) +  0.55*exp(-((value-0.5)**2)/0.08)
+        color[:, 1] = 0.99*exp(-((value)**2)/0.08) + 0.8* exp(-((value - 0.6)**2)/0.08) + 0.5* exp(-((value + 0.35)**2)/0.02)
+        color[:, 2] = exp(-((value+0.5)**2)/0.08) + 0.5*exp(-((value)**2)/0.02)
+    elif colormap == "Jet":
+        # Same thresholds as the per-value color_map() if/elif chain: the first matching band wins
+        bands = [value < 0.11, value < 0.125, value < 0.34, value < 0.35, value < 0.375, value < 0.64, value < 0.90]
+        red_rise = (value - 0.35) / (0.66 - 0.35)
+        green_rise = (value - 0.125) / (0.375 - 0.125)
+        blue_fall = ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34)
+        color[:, 0] = np.select(bands, [0, 0, 0, 0, red_rise, red_rise, 1],
+                                ((0.5 - 1.0)/(1 - 0.89)) * value + (0.5 - ((0.5 - 1.0)/(1 - 0.89)) *1.0))
+        color[:, 1] = np.select(bands, [0, green_rise, green_rise, green_rise, green_rise, 1,
+                                        1 - (value - 0.64) / (0.91 - 0.64)], 0)
+        color[:, 2] = np.select(bands, [((1 - 0.5)/(0.11 - 0)) * value + (1 - ((1 - 0.5)/(0.11 - 0))*0.11),
+                                        1, 1, blue_fall, blue_fall, blue_fall, 0], 0)
+    else:
+        raise ValueError("Unknown colormap: %s" % colormap)
+    return color.astype(np.float32)
+
+# Open scene_construction() blocks, the object links and transforms they have queued, and
+# the view-layer updates they have avoided so far
+scene_construction_state = {"depth": 0, "links": [], "transforms": [], "avoided": 0}
+
+def link_object(obj, collection=None):
+    # Link 'obj' to 'collection' (the active collection by default) now, or when the
+    # enclosing scene_construction() block exits
+    collection = bpy.context.collection if collection is None else collection
+    if scene_construction_state["depth"]:
+        scene_construction_state["links"].append((collection, obj))
+    else:
+        collection.objects.link(obj)
+
+def apply_transform(obj, location=None, rotation=None, scale=None):
+    # Write the transform straight to location/rotation_euler/scale, without transform operators
+    if location is not None:
+        obj.location = location
+    if rotation is not None:
+        obj.rotation_euler = rotation
+    if scale is not None:
+        obj.scale = scale
+
+def set_transform(obj, location=None, rotation=None, scale=None):
+    # apply_transform() now, or when the enclosing scene_construction() block exits
+    if scene_construction_state["depth"]:
+        scene_construction_state["transforms"].append((obj, location, rotation, scale))
+    else:
+        apply_transform(obj, location, rotation, scale)
+
+@contextmanager
+def scene_construction():
+    # Scene construction block: the object links and transforms requested inside it are queued
+    # and applied when the outermost block exits, followed by exactly one view-layer update.
+    # Built with operators, every one of them evaluated the scene; the updates saved that way
+    # are added to scene_construction_state["avoided"].
+    state = scene_construction_state
+    state["depth"] += 1
+    try:
+        yield state
+    finally:
+        state["depth"] -= 1
+        if state["depth"] == 0:
+            links, transforms = state["links"], state["transforms"]
+            state["links"], state["transforms"] = [], []
+            for collection, obj in links:
+                collection.objects.link(obj)
+            for transform in transforms:
+                apply_transform(*transform)
+            bpy.context.view_layer.update()
+            state["avoided"] += max(len(links) + len(transforms) - 1, 0)
+
+def session_cache(name):
+    # Dictionary that outlives a single run of the script: it lives as long as the Blender session
+    return bpy.app.driver_namespace.setdefault(name, {})
+
+def colormap_lut(colormap, resolution):
+    # Colormap baked once into a (resolution, 4) table, cached per session by name and resolution
+    cache = session_cache("colormap_luts")
+    key = (colormap, resolution)
+    if key not in cache:
+        cache[key] = colormap_curves(np.linspace(0, 1, resolution), colormap)
+    return cache[key]
+
+def color_map_lut(values, colormap, display_levels, resolution=1024, interpolate=True):
+    # RGBA (N,4) colours of an array of heights: a gather from the cached lookup table
+    # instead of evaluating the colormap curves for every value
+    if display_levels:
+        raise ValueError("Contour levels are not supported by color_map_lut")
+    lut = colormap_lut(colormap, resolution)
+    position = np.clip(normalize_function_values_1(np.asarray(values, dtype=np.float64)), 0, 1) * (resolution - 1)
+    if not interpolate:
+        return lut[np.rint(position).astype(np.intp)]
+    index = np.minimum(position.astype(np.intp), resolution - 2)
+    weight = (position - index).astype(np.float32)[:, None]
+    return lut[index] * (1 - weight) + lut[index + 1] * weight
+
+def loop_vertex_indices(mesh):
+    # Loop-to-vertex index array of a mesh, cached per session. A mesh that is rebuilt gets a
+    # new pointer or new vertex/loop/face counts, which invalidates its entry.
+    cache = session_cache("loop_vertex_indices")
+    key = (mesh.name_full, mesh.as_pointer())
+    counts = (len(mesh.vertices), len(mesh.loops), len(mesh.polygons))
+    if key not in cache or cache[key][0] != counts:
+        loop_vertices = np.empty(counts[1], dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vertices)
+        cache[key] = (counts, loop_vertices)
+    return cache[key][1]
+
+def create_mesh_object(name, vertices, corner_vertices, face_sizes):
+    # Build a mesh straight from numpy arrays: (V,3) vertex coordinates, the vertex index of
+    # every face corner and the number of corners of every face. No operators are involved.
+    face_sizes = np.asarray(face_sizes, dtype=np.int32)
+    loop_start = np.zeros(len(face_sizes), dtype=np.int32)
+    np.cumsum(face_sizes[:-1], out=loop_start[1:])
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.loops.add(len(corner_vertices))
+    mesh.polygons.add(len(face_sizes))
+    mesh.vertices.foreach_set("co", np.asarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.asarray(corner_vertices, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    # Newer Blender versions derive the face sizes from loop_start
+    if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+    mesh.update(calc_edges=True)
+    obj = bpy.data.objects.new(name, mesh)
+    link_object(obj)
+    return obj
+
+def create_grid_object(name, x, y, location=(0, 0, 0)):
+    # Flat grid with a vertex at every (x[i], y[j]) and one quad per cell; x and y can have
+    # any length and any (also non-uniform) spacing
+    vertices = np.zeros((len(y), len(x), 3))
+    vertices[..., 0] = x
+    vertices[..., 1] = np.asarray(y)[:, None]
+    index = np.arange(len(x) * len(y)).reshape(len(y), len(x))
+    quads = np.stack([index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]], axis=-1)
+    obj = create_mesh_object(name, vertices.reshape(-1, 3), quads.ravel(), np.full((len(x) - 1) * (len(y) - 1), 4))
+    set_transform(obj, location=location)
+    return obj
+
+def mesh_coords(mesh):
+    # (N,3) float32 copy of every vertex coordinate, read with one foreach_get
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+def write_heights(mesh, co, z):
+    # Replace the Z of the (N,3) coordinates and upload them with a single foreach_set
+    co[:, 2] = z
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
+
+def update_cache_key(digest, value, seen):
+    # Feed 'value' into the hash 'digest' by content. Arrays are hashed by their bytes (repr()
+    # elides large arrays), functions by their code, defaults, captured cells and the values of
+    # the globals they read, recursing into nested functions and code objects.
+    if isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        if value.dtype.hasobject:
+            for item in value.ravel():
+                update_cache_key(digest, item, seen)
         else:
-              color = [ ((0.5 - 1.0)/(1 - 0.89)) * value + (0.5 - ((0.5 - 1.0)/(1 - 0.89)) *1.0),
-              0,
-              0,
-              1]
-    return color
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(type(value).__name__.encode())
+        for item in value:
+            update_cache_key(digest, item, seen)
+    elif isinstance(value, dict):
+        digest.update(b"dict")
+        for item_key in sorted(value, key=repr):
+            update_cache_key(digest, item_key, seen)
+            update_cache_key(digest, value[item_key], seen)
+    elif isinstance(value, types.ModuleType):
+        digest.update(value.__name__.encode())
+    elif isinstance(value, types.CodeType):
+        digest.update(value.co_code)
+        digest.update(repr((value.co_names, value.co_varnames)).encode())
+        for constant in value.co_consts:
+            update_cache_key(digest, constant, seen)
+    elif isinstance(value, types.FunctionType):
+        # A function reached again (recursion, or a global read twice) is only named
+        if id(value) in seen:
+            digest.update(value.__qualname__.encode())
+            return
+        seen.add(id(value))
+        update_cache_key(digest, value.__code__, seen)
+        update_cache_key(digest, value.__defaults__, seen)
+        update_cache_key(digest, value.__kwdefaults__, seen)
+        for cell in value.__closure__ or ():
+            update_cache_key(digest, cell.cell_contents, seen)
+        for name in sorted(code_global_names(value.__code__)):
+            if name in value.__globals__:
+                digest.update(name.encode())
+                update_cache_key(digest, value.__globals__[name], seen)
+    else:
+        digest.update(repr(value).encode())
+
+def code_global_names(code):
+    # Names a code object and the code nested in it may look up as globals
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= code_global_names(constant)
+    return names
+
+def frames_cache_key(x, y, times, field, cache_key=None):
+    # Hash identifying what precompute_frames stored: the vertex coordinates, the times, the
+    # field with everything update_cache_key() can see of it, and 'cache_key', the caller's
+    # version of whatever else the field depends on (data read from files, object state, ...)
+    digest = hashlib.sha1()
+    for values in (x, y, times):
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    update_cache_key(digest, field, set())
+    update_cache_key(digest, cache_key, set())
+    return digest.hexdigest()
+
+def precompute_frames(x, y, times, field=None, spatial=None, temporal=None, cache_path=None, cache_key=None):
+    # Heights of the vertices at (x, y) for every time in 'times'; returns a function that
+    # gives the heights of frame i.
+    # A separable field is passed as spatial(x, y) and temporal(t): the spatial shape is
+    # evaluated once and each frame costs one scalar-times-array multiply.
+    # Any other field(x, y, t) is evaluated once into a (frames, nverts) float32 array. With
+    # 'cache_path' that array is a memory-mapped .npy file. frames_cache_key() of the
+    # coordinates, the times, 'field' and 'cache_key' is kept next to it in cache_path + '.key';
+    # later runs reuse the file only while that key matches and evaluate the field again
+    # otherwise.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if spatial is not None:
+        shape = np.asarray(spatial(x, y), dtype=np.float32)
+        amplitude = np.asarray(temporal(np.asarray(times)), dtype=np.float32)
+        return lambda i: shape * amplitude[i]
+    frames_shape = (len(times), len(x))
+    if cache_path is not None:
+        key = frames_cache_key(x, y, times, field, cache_key)
+        key_path = cache_path + ".key"
+        if os.path.exists(cache_path) and os.path.exists(key_path):
+            with open(key_path) as key_file:
+                cached_key = key_file.read()
+            heights = np.load(cache_path, mmap_mode='r')
+            if cached_key == key and heights.shape == frames_shape:
+                return lambda i: heights[i]
+            del heights
+        if os.path.exists(key_path):
+            os.remove(key_path)
+    if cache_path is None:
+        heights = np.empty(frames_shape, dtype=np.float32)
+    else:
+        heights = np.lib.format.open_memmap(cache_path, mode='w+', dtype=np.float32, shape=frames_shape)
+    for i, time in enumerate(times):
+        heights[i] = field(x, y, time)
+    if cache_path is not None:
+        heights.flush()
+        with open(key_path, "w") as key_file:
+            key_file.write(key)
+    return lambda i: heights[i]
+
+def build_vertex_color_material(mat):
+    # Create a new node tree for the material
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+
+    # Clear default nodes
+    for node in nodes:
+        nodes.remove(node)
+
+    # Add a Vertex Color node
+    vc_node = nodes.new(type='ShaderNodeVertexColor')
+    vc_node.layer_name = 'Attribute'
+    vc_node.location = (0,0)  # Optional: Set the location of the node
+
+    # Add a Principled BSDF shader node
+    bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
+    bsdf_node.location = (400,0)  # Optional: Set the location of the node
+
+    # Add an Output node
+    output_node = nodes.new(type='ShaderNodeOutputMaterial')
+    output_node.location = (600,0)  # Optional: Set the location of the node
+
+    # Connect the nodes
+    mat.node_tree.links.new(vc_node.outputs["Color"], bsdf_node.inputs["Base Color"])
+    mat.node_tree.links.new(bsdf_node.outputs["BSDF"], output_node.inputs["Surface"])
+
+def bake_shape_keys(obj, co, frame_heights, frames):
+    # One shape key per frame, keyframed so that it is fully active only on its own frame.
+    # 'co' is the (N,3) basis coordinates, reused as the buffer of every key.
+    obj.shape_key_add(name="Basis", from_mix=False)
+    for frame in frames:
+        key = obj.shape_key_add(name="Frame_%d" % frame, from_mix=False)
+        co[:, 2] = frame_heights(frame)
+        key.data.foreach_set("co", co.ravel())
+        for key_frame, value in ((frame - 1, 0), (frame, 1), (frame + 1, 0)):
+            key.value = value
+            key.keyframe_insert("value", frame=key_frame)
+
+def colormap_image(colormap, resolution):
+    # The cached colormap lookup table as a (resolution x 1) float image a shader can sample
+    name = "colormap_%s_%d" % (colormap, resolution)
+    image = bpy.data.images.get(name)
+    if image is None:
+        image = bpy.data.images.new(name, resolution, 1, alpha=True, float_buffer=True)
+        # The table holds the same sRGB values that are written to the vertex colour layer
+        image.colorspace_settings.name = 'sRGB'
+        image.pixels.foreach_set(colormap_lut(colormap, resolution).ravel())
+    return image
+
+def create_height_colormap_material(name, image, z_range):
+    # Colours a surface in the shader from its object space height through the colormap image,
+    # so the colours follow the shape keys without per-frame vertex colours. Built once per
+    # image and height range through the material registry.
+    def build(mat):
+        mat.use_nodes = True
+        nodes = mat.node_tree.nodes
+        links = mat.node_tree.links
+        for node in nodes:
+            nodes.remove(node)
+        coord_node = nodes.new(type='ShaderNodeTexCoord')
+        separate_node = nodes.new(type='ShaderNodeSeparateXYZ')
+        # Map the heights onto the centres of the first and last pixels of the image
+        range_node = nodes.new(type='ShaderNodeMapRange')
+        range_node.clamp = True
+        range_node.inputs["From Min"].default_value = z_range[0]
+        range_node.inputs["From Max"].default_value = z_range[1]
+        range_node.inputs["To Min"].default_value = 0.5 / image.size[0]
+        range_node.inputs["To Max"].default_value = 1 - 0.5 / image.size[0]
+        combine_node = nodes.new(type='ShaderNodeCombineXYZ')
+        combine_node.inputs["Y"].default_value = 0.5
+        texture_node = nodes.new(type='ShaderNodeTexImage')
+        texture_node.image = image
+        texture_node.extension = 'EXTEND'
+        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
+        output_node = nodes.new(type='ShaderNodeOutputMaterial')
+        for i, node in enumerate((coord_node, separate_node, range_node, combine_node, texture_node, bsdf_node, output_node)):
+            node.location = (200*i, 0)
+        links.new(coord_node.outputs["Object"], separate_node.inputs[0])
+        links.new(separate_node.outputs["Z"], range_node.inputs["Value"])
+        links.new(range_node.outputs["Result"], combine_node.inputs["X"])
+        links.new(combine_node.outputs["Vector"], texture_node.inputs["Vector"])
+        links.new(texture_node.outputs["Color"], bsdf_node.inputs["Base Color"])
+        links.new(bsdf_node.outputs["BSDF"], output_node.inputs["Surface"])
+    return get_material(name, build, (image.name, float(z_range[0]), float(z_range[1])))
+
+def write_vertex_colors(mesh, layer, vertex_colors):
+    # Expand the (N,4) per-vertex colours to every face corner with one gather
+    # and upload them with a single foreach_set
+    layer.data.foreach_set("color", vertex_colors[loop_vertex_indices(mesh)].ravel())
 
 def set_white_background():
     bpy.context.scene.render.engine = 'CYCLES'
@@ -125,25 +478,174 @@ def set_white_background():
     # Set this thing to 1
     alpha_over_node.premul = 1
 
-def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label, XoY_color, YoZ_color, XoZ_color):
-    bpy.ops.mesh.primitive_cylinder_add(radius=1, depth=1)
-    bpy.ops.transform.resize(value=(thickness, thickness, thickness))
+def axis_frame(direction):
+    # Two unit vectors perpendicular to 'direction' and to each other, (u, v, direction) right-handed
+    w = np.asarray(direction, dtype=np.float64)
+    w = w / np.linalg.norm(w)
+    helper = np.array([0, 0, 1.0]) if abs(w[2]) < 0.999 else np.array([1.0, 0, 0])
+    u = np.cross(helper, w)
+    u /= np.linalg.norm(u)
+    return u, np.cross(w, u)
+
+def cylinder_geometry(start, end, radius, segments=32):
+    # Vertices and faces of a capped cylinder of 'radius' running from point 'start' to point 'end'
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    u, v = axis_frame(end - start)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + start, ring + end])
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    sides = np.stack([i, j, j + segments, i + segments], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1], i + segments])
+    face_sizes = np.concatenate([np.full(segments, 4), [segments, segments]])
+    return vertices, corner_vertices, face_sizes
+
+def cone_geometry(base, tip, radius, segments=32):
+    # Vertices and faces of a cone with a base of 'radius' centred on 'base' and its apex at 'tip'
+    base = np.asarray(base, dtype=np.float64)
+    u, v = axis_frame(np.asarray(tip, dtype=np.float64) - base)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + base, [tip]])
+    i = np.arange(segments)
+    sides = np.stack([i, (i + 1) % segments, np.full(segments, segments)], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1]])
+    face_sizes = np.concatenate([np.full(segments, 3), [segments]])
+    return vertices, corner_vertices, face_sizes
+
+def quad_geometry(centres, u, v):
+    # Vertices and faces of one rectangle per centre, spanning centre - u - v to centre + u + v.
+    # 'centres' is a single point or a (K,3) array of them.
+    centres = np.reshape(np.asarray(centres, dtype=np.float64), (-1, 3))
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) @ np.array([u, v], dtype=np.float64)
+    vertices = (centres[:, None, :] + corners).reshape(-1, 3)
+    return vertices, np.arange(len(vertices)), np.full(len(centres), 4)
+
+def points_along(x, y, z):
+    # (K,3) points from coordinates that are each a scalar or an array of length K
+    return np.column_stack(np.broadcast_arrays(x, y, z))
+
+def merge_geometry(parts):
+    # Concatenate (vertices, corner_vertices, face_sizes) parts into one, offsetting their indices
+    offsets = np.cumsum([0] + [len(vertices) for vertices, _, _ in parts[:-1]])
+    return (np.concatenate([vertices for vertices, _, _ in parts]),
+            np.concatenate([corners + offset for (_, corners, _), offset in zip(parts, offsets)]),
+            np.concatenate([sizes for _, _, sizes in parts]))
+
+# Axis, cone, grid line and plane geometry of the plot, grouped by (material name, colour)
+axis_geometry = {}
+
+def add_axis_geometry(material, colour, geometry):
+    axis_geometry.setdefault((material, tuple(colour)), []).append(geometry)
+
+def create_axis_objects():
+    # Build one mesh object per material out of everything create_axis() collected
+    objects = []
+    for (material, colour), parts in axis_geometry.items():
+        obj = create_mesh_object("axes." + material, *merge_geometry(parts))
+        create_diffuse_material(obj, colour, material)
+        objects.append(obj)
+    axis_geometry.clear()
+    return objects
+
+# Text of the tick labels, axis labels and title: (body, location, size, rotation) per label
+axis_labels = []
+
+def add_axis_label(body, location, size, rotation=None):
+    # 'rotation' is a 3x3 matrix; labels without one face the camera given to create_label_objects()
+    axis_labels.append((body, location, size, rotation))
+
+def camera_facing_rotation(camera):
+    # Rotation that turns text to face 'camera', as a matrix. It is read from matrix_basis,
+    # which follows camera.location and camera.rotation_euler as soon as the script sets them;
+    # matrix_world is only refreshed by the next depsgraph evaluation. The camera has no parent.
+    view_vector = camera.matrix_basis.to_quaternion() @ Vector((0, 0, 1))
+    return np.array(view_vector.to_track_quat('Z', 'Y').to_matrix())
+
+def mesh_geometry(mesh):
+    # (vertices, corner_vertices, face_sizes) of a mesh, read with foreach_get
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    corner_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_vertices)
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", face_sizes)
+    return vertices.reshape(-1, 3), corner_vertices, face_sizes
+
+def convert_font_curves(texts, font=None):
+    # Mesh geometry of unit-size text for every string in 'texts', converted from temporary font
+    # curves after a single depsgraph evaluation
+    curves = []
+    objects = []
+    for body in texts:
+        curve = bpy.data.curves.new("label", type='FONT')
+        curve.body = body
+        if font is not None:
+            curve.font = font
+        obj = bpy.data.objects.new("label", curve)
+        bpy.context.scene.collection.objects.link(obj)
+        curves.append(curve)
+        objects.append(obj)
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    meshes = [bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph)) for obj in objects]
+    geometry = [mesh_geometry(mesh) for mesh in meshes]
+    bpy.data.batch_remove(objects + curves + meshes)
+    return geometry
+
+def glyph_atlas(characters, font=None):
+    # Unit-size geometry and advance of every character of a font, kept for the whole session.
+    # Only characters that are not in the atlas yet are converted, all in one pass. The advance
+    # of a character is how far it pushes a following "|": the width of "|c|" minus that of "||".
+    glyphs = session_cache("label_glyphs").setdefault(None if font is None else font.name_full, {})
+    missing = sorted(set(characters) - set(glyphs))
+    if missing:
+        geometry = convert_font_curves(["||"] + missing + ["|%s|" % c for c in missing], font)
+        bars_width = geometry[0][0][:, 0].max()
+        for n, c in enumerate(missing):
+            framed_width = geometry[1 + len(missing) + n][0][:, 0].max()
+            glyphs[c] = geometry[1 + n] + (framed_width - bars_width,)
+    return glyphs
+
+def label_geometry(body, glyphs):
+    # Unit-size geometry of one line of text, laid out from the atlas glyphs
+    parts = []
+    x = 0.0
+    for c in body:
+        vertices, corner_vertices, face_sizes, advance = glyphs[c]
+        parts.append((vertices + (x, 0, 0), corner_vertices, face_sizes))
+        x += advance
+    return merge_geometry(parts)
+
+def create_label_objects(camera=None, font=None):
+    # Turn every collected label into one joined text mesh, assembled from the glyph atlas so
+    # only characters never used before in this session go through a font curve. The camera
+    # rotation is read once and shared by all the labels that face it (without a camera they
+    # lie in XoY).
+    labels = [label for label in axis_labels if label[0]]
+    axis_labels.clear()
+    if not labels:
+        return None
+    facing = np.eye(3) if camera is None else camera_facing_rotation(camera)
+    glyphs = glyph_atlas("".join(body for body, _, _, _ in labels), font)
+    parts = []
+    for body, location, size, rotation in labels:
+        vertices, corner_vertices, face_sizes = label_geometry(body, glyphs)
+        rotation = facing if rotation is None else np.asarray(rotation)
+        parts.append(((size*vertices) @ rotation.T + location, corner_vertices, face_sizes))
+    obj = create_mesh_object("axes.labels", *merge_geometry(parts))
+    create_diffuse_material(obj, (0, 0, 0, 1), "text_material")
+    return obj
 
+def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label, XoY_color, YoZ_color, XoZ_color):
     if (axis == 'X'):
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Y')
-        bpy.ops.transform.resize(value=((xlim[1]-xlim[0])/thickness, 1, 1))
-        bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0], zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")  
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=3)
-        bpy.ops.transform.rotate(value=-radians(90), orient_axis='Y')
-        bpy.ops.transform.translate(value=(xlim[1], ylim[0], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the X range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[1], ylim[0], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[1] - 4.5*thickness, ylim[0], zlim[0]),
+                                        (xlim[1] + 4.5*thickness, ylim[0], zlim[0]), 3*thickness))
 
         # Round off x coords used for text and grid lines:
         if (xlim[0] > 0):
@@ -161,71 +663,33 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xmin + xstep*N + 0.02
-                obj.location.y = ylim[1] + 0.05
-                obj.location.z = zlim[0] - 0.1
-                text_data = obj.data
-                text_data.body = str(round((xmin + xstep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((xmin + xstep*N)*10)/10), (xmin + xstep*N + 0.02, ylim[1] + 0.05, zlim[0] - 0.1), 0.12)
                 
         # Create 'xlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = 0.5*(xlim[1]+xlim[0]) * (0.95 + len(label)/10)
-        obj.location.y = ylim[1] + 0.05
-        obj.location.z = zlim[0] - 0.3
-        text_data = obj.data
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (0.5*(xlim[1]+xlim[0]) * (0.95 + len(label)/10), ylim[1] + 0.05, zlim[0] - 0.3), 0.13)
         
         
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xmin + xstep*N, ylim[0], (zlim[1]+zlim[0])*0.5 )) # anchor point
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                               
-            for N in range(1,5):
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xmin + xstep*N, (ylim[1]+ylim[0])*0.5, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-            
-            # Add the plane XoY:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], ylim[1]-ylim[0], 1))                
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, XoY_color, "plane_material")
+            # Lines up the XoZ plane and across the XoY plane at every tick, then the XoY plane
+            x = xmin + xstep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, ylim[0], 0.5*(zlim[1]+zlim[0])),
+                                            (0.25*thickness, 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, 0.5*(ylim[1]+ylim[0]), zlim[0]),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", XoY_color,
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
                             
     elif (axis == 'Y'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.resize(value=(1, (ylim[1]-ylim[0])/thickness, 1))
-        bpy.ops.transform.translate(value=(xlim[0], 0.5*(ylim[1]+ylim[0]), zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.translate(value=(xlim[0], ylim[1], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")   
+        # Axis along the Y range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[1], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[1] - 3*thickness, zlim[0]),
+                                        (xlim[0], ylim[1] + 3*thickness, zlim[0]), 3*thickness))
 
         # Round off y coords used for text and grid lines:
         if (ylim[0] > 0):
@@ -243,71 +707,32 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the Y-axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[1] + 0.02
-                obj.location.y = ymin + ystep*N - 0.2
-                obj.location.z = zlim[0] - 0.2
-                text_data = obj.data
-                text_data.body = str(round((ymin + ystep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((ymin + ystep*N)*10)/10), (xlim[1] + 0.02, ymin + ystep*N - 0.2, zlim[0] - 0.2), 0.12)
                 
         # Create 'ylabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[1] + 0.07
-        obj.location.y = 0.5*(ylim[1]+ylim[0]) - 0.3
-        obj.location.z = zlim[0] - 0.4
-        text_data = obj.data
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
+        add_axis_label(label, (xlim[1] + 0.07, 0.5*(ylim[1]+ylim[0]) - 0.3, zlim[0] - 0.4), 0.13)
             
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # Add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xlim[0], ymin + ystep*N, (zlim[1]+zlim[0])*0.5))
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                
-            for N in range(1,5): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))                
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ymin + ystep*N, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-           
-            # Add the plane YoZ:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(zlim[1]-zlim[0], ylim[1]-ylim[0], 1))    
-            bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)              
-            bpy.ops.transform.translate(value=(xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, YoZ_color, "plane_material")   
+            # Lines up the YoZ plane and across the XoY plane at every tick, then the YoZ plane
+            y = ymin + ystep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], y, 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.25*thickness, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), y, zlim[0]),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("plane_material", YoZ_color,
+                              quad_geometry((xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.5*(ylim[1]-ylim[0]), 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
                  
     elif (axis == 'Z'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Z')
-        bpy.ops.transform.resize(value=(1, 1, (zlim[1]-zlim[0])/thickness))
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], 0.5*(zlim[1]+zlim[0])))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], zlim[1]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the Z range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[0], zlim[1]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[0], zlim[1] - 3*thickness),
+                                        (xlim[0], ylim[0], zlim[1] + 3*thickness), 3*thickness))
 
         # Round off z coords used for text and grid lines:
         if (zlim[0] > 0):
@@ -325,67 +750,27 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[1] + 0.05
-                obj.location.y = ylim[0] - 0.3
-                obj.location.z = zmin + zstep*N - 0.10
-                text_data = obj.data
-                text_data.body = str(round((zmin + zstep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((zmin + zstep*N)*10)/10), (xlim[1] + 0.05, ylim[0] - 0.3, zmin + zstep*N - 0.10), 0.12)
             
         # Create 'zlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[1] + 0.05
-        obj.location.y = ylim[0]  - 0.7*(0.8 + len(label)/10)
-        obj.location.z = 0.5*(zlim[1] + zlim[0]) * 1.1
-        text_data = obj.data
-        text_data.body = label    
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (xlim[1] + 0.05, ylim[0]  - 0.7*(0.8 + len(label)/10), 0.5*(zlim[1] + zlim[0]) * 1.1), 0.13)
                           
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,4): #add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ylim[0], zmin + zstep*N)) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                                    
-            for N in range(1,4): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xlim[0], (ylim[1]+ylim[0])*0.5, zmin + zstep*N))  
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")                            
-            
-            #add the XoZ plane:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], zlim[1]-zlim[0], 1))  
-            bpy.ops.transform.rotate(value=radians(90), orient_axis='X')              
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, XoZ_color, "plane_material")   
+            # Flat lines along the back edges of the XoY plane at every tick, then the XoZ plane
+            z = zmin + zstep*np.arange(1, 4)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), ylim[0], z),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], 0.5*(ylim[1]+ylim[0]), z),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", XoZ_color,
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
 
 def set_title(label):
-    bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-    obj = bpy.context.active_object
-    obj.location.x = xlim[0] + 0.05
-    obj.location.y = ylim[0] - 0.35
-    obj.location.z = zlim[1] * 1.3
-    text_data = obj.data
-    text_data.body = label    
-    text_data.size = 0.15
-    text = bpy.context.active_object
-    align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-    create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+    add_axis_label(label, (xlim[0] + 0.05, ylim[0] - 0.35, zlim[1] * 1.3), 0.15)
 
     
 
@@ -403,130 +788,113 @@ camera.location.z = (zlim[1] - zlim[0])*1*6.336805 * cos(camera.rotation_euler.x
 set_white_background()
 
 
-create_axis('X', 
-            colour_x_axis, 
-            thickness_x_axis, 
-            display_grid,
-            display_tick, 
-            xlim, 
-            ylim, 
-            zlim,
-            label_x_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-create_axis('Y', 
-            colour_y_axis, 
-            thickness_y_axis, 
-            display_grid,
-            display_tick,  
-            xlim, 
-            ylim, 
-            zlim,
-            label_y_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-create_axis('Z', 
-            colour_z_axis, 
-            thickness_z_axis, 
-            display_grid,
-            display_tick, 
-            xlim, 
-            ylim, 
-            zlim,
-            label_z_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-set_title(title_plot)
+# Object links and transforms wait for a single view-layer update at the end
+with scene_construction():
+    create_axis('X', 
+                colour_x_axis, 
+                thickness_x_axis, 
+                display_grid,
+                display_tick, 
+                xlim, 
+                ylim, 
+                zlim,
+                label_x_axis,
+                XoY_color,
+                YoZ_color,
+                XoZ_color) 
+
+    create_axis('Y', 
+                colour_y_axis, 
+                thickness_y_axis, 
+                display_grid,
+                display_tick,  
+                xlim, 
+                ylim, 
+                zlim,
+                label_y_axis,
+                XoY_color,
+                YoZ_color,
+                XoZ_color) 
+
+    create_axis('Z', 
+                colour_z_axis, 
+                thickness_z_axis, 
+                display_grid,
+                display_tick, 
+                xlim, 
+                ylim, 
+                zlim,
+                label_z_axis,
+                XoY_color,
+                YoZ_color,
+                XoZ_color) 
+
+    # Turn the collected axis geometry into one object per material
+    create_axis_objects()
+
+    set_title(title_plot)
+
+    # Join every label and the title into one text mesh
+    create_label_objects(bpy.data.objects.get("Camera"))
      
 #### NOW CREATE THE 3D CONTOUR PLOT ANIMATION ################
 
-bpy.ops.mesh.primitive_grid_add(x_subdivisions=100, y_subdivisions=100,  location=(0, 0, 0))
-bpy.ops.transform.resize(value=(1, 1, 1))
+# 101 x 101 vertices (100 x 100 faces) spanning [-1, 1] on both axes
+obj = create_grid_object("Grid", np.linspace(-1, 1, 101), np.linspace(-1, 1, 101))
+mesh = obj.data
 
 t = arange(0, 3, 0.0001)
 
 max_step = 120;
 
-for step in range(1, max_step):
-    
-    bpy.ops.object.mode_set(mode='EDIT')
-    
-    obj = bpy.context.active_object
-    mesh = obj.data
-
-    bm = bmesh.from_edit_mesh(mesh)
-    for v in bm.verts:
-        x = v.co.x
-        y = v.co.y
-        z = (cos(1*pi*(x+1)/2) * cos(2*pi*(y+1)/2)) * sin(2 * pi * 200 * t[step]) # Attention!! Coordinate translation is necessary!
-        #z = (0.00005/t[step])*exp(-(x**2 + y**2) / (0.2)) / ((0.2) * pi)
-        v.co.z = z
-
-    bmesh.update_edit_mesh(mesh)
-
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    # Switch to Vertex Paint mode
-    bpy.ops.object.mode_set(mode='VERTEX_PAINT')
-
+# Evaluate the normal mode for every frame up front. The mode is separable: only the
+# amplitude changes in time. Attention!! Coordinate translation is necessary!
+grid_co = mesh_coords(mesh)
+frame_heights = precompute_frames(grid_co[:, 0], grid_co[:, 1], t[:max_step],
+                                  spatial=lambda x, y: np.cos(1*pi*(x+1)/2) * np.cos(2*pi*(y+1)/2),
+                                  temporal=lambda t: np.sin(2 * pi * 200 * t))
+# A non separable field is cached in a memory-mapped file instead:
+#frame_heights = precompute_frames(grid_co[:, 0], grid_co[:, 1], t[:max_step],
+#                                  field=lambda x, y, t: (0.00005/t)*exp(-(x**2 + y**2) / (0.2)) / ((0.2) * pi),
+#                                  cache_path=bpy.path.abspath("//contour_frames.npy"))
+
+if animation_mode == "shape_keys":
+    # Bake everything once; Blender then renders the frames without running any Python
+    bake_shape_keys(obj, grid_co, frame_heights, range(1, max_step))
+    obj.data.materials.append(create_height_colormap_material("Height Colormap Material",
+                                                              colormap_image(colormap, colormap_resolution),
+                                                              (min_z, max_z)))
+    bpy.context.scene.frame_start = 1
+    bpy.context.scene.frame_end = max_step - 1
+    bpy.context.scene.render.image_settings.file_format = 'JPEG'
+    bpy.context.scene.render.filepath = '/home/pinto/Pictures/G/vr_shot_'
+    bpy.ops.render.render(animation=True)
+else:
     # Set the active vertex color layer
     active_vc_layer = obj.data.vertex_colors.active
     if active_vc_layer is None:
         active_vc_layer = obj.data.vertex_colors.new()
 
-    # Loop through the vertices and set them to red
-    for poly in obj.data.polygons:
-        for loop_index in poly.loop_indices:
-            loop = obj.data.loops[loop_index]
-            vertex_index = loop.vertex_index
-            vert = mesh.vertices[vertex_index]
-            color = color_map(vert.co.z, colormap, display_levels)
-    #            color = [4*abs(vert.co.z), 0, 0, 1]  # Red color (RGBA)
-    #        else:
-    #            color = [0, 0, 4*abs(vert.co.z), 1]  # Red color (RGBA)
-            active_vc_layer.data[loop_index].color = color
-
-    # Create a new material
-    mat = bpy.data.materials.new(name="Vertex Color Material")
-    obj.data.materials.append(mat)
-
-    # Get a reference to the material
-    mat = obj.data.materials[0]
+    # Build the vertex colour material once and reuse it on every frame
+    mat = get_material("Vertex Color Material", build_vertex_color_material)
+    if mat.name not in obj.data.materials:
+        obj.data.materials.append(mat)
 
-    # Create a new node tree for the material
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
+    for step in range(1, max_step):
 
-    # Clear default nodes
-    for node in nodes:
-        nodes.remove(node)
+        vertex_z = frame_heights(step)
+        write_heights(mesh, grid_co, vertex_z)
 
-    # Add a Vertex Color node
-    vc_node = nodes.new(type='ShaderNodeVertexColor')
-    vc_node.layer_name = 'Attribute'
-    vc_node.location = (0,0)  # Optional: Set the location of the node
-
-    # Add a Principled BSDF shader node
-    bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf_node.location = (400,0)  # Optional: Set the location of the node
-
-    # Add an Output node
-    output_node = nodes.new(type='ShaderNodeOutputMaterial')
-    output_node.location = (600,0)  # Optional: Set the location of the node
-
-    # Connect the nodes
-    mat.node_tree.links.new(vc_node.outputs["Color"], bsdf_node.inputs["Base Color"])
-    mat.node_tree.links.new(bsdf_node.outputs["BSDF"], output_node.inputs["Surface"])
+        # Colour every vertex in one call
+        vertex_colors = color_map_lut(vertex_z, colormap, display_levels, colormap_resolution)
 
-    bpy.ops.object.mode_set(mode='OBJECT')
+        write_vertex_colors(mesh, active_vc_layer, vertex_colors)
 
-    bpy.context.scene.render.filepath = '/home/pinto/Pictures/G/vr_shot_%d.jpg' % step
-    bpy.ops.render.render(write_still=True);
+        bpy.context.scene.render.filepath = '/home/pinto/Pictures/G/vr_shot_%d.jpg' % step
+        bpy.ops.render.render(write_still=True);
 
+# Drop the cached materials that nothing uses any more
+purge_unused_materials()
 
+print("Materials: %d created, %d reused" % (material_stats["created"], material_stats["reused"]))
+print("Scene construction: %d view-layer updates avoided" % scene_construction_state["avoided"])
@@ -1,8 +1,9 @@
 import bpy
-from math import radians, sin, cos, cosh, ceil, floor
-from numpy import exp, pi, arange, zeros
+from contextlib import contextmanager
+from math import cos, ceil, floor
+import numpy as np
+from numpy import pi, arange
 from mathutils import Vector, Matrix
-import bmesh
 
 ######## REDER PROPERTIES #####################
 
@@ -18,6 +19,21 @@ colormap = "Jet"
 # display contour plot levels
 display_levels = False
 
+######## VECTOR PROPERTIES ##################
+
+# "instances": draw every vector as an instance of one arrow mesh (Geometry Nodes)
+# "pool": keep one object per vector alive across frames, all sharing one arrow mesh
+# "objects": build two new objects per vector and frame with draw_vector()
+glyph_mode = "instances"
+
+# What to do when the last frames would sample vectors past the end of the curves:
+# "raise": stop before rendering, "pad": hold the last sample, "wrap": continue from the start
+overflow_mode = "raise"
+
+# How the vector directions follow the curve: "forward", "central" or "central4" finite
+# differences of its samples, or "analytic" to sample the derivative given with the curve
+tangent_scheme = "forward"
+
 ######## AXIS PROPERTIES ##################
 
 # Set plot flags and properties:
@@ -48,67 +64,103 @@ min_x = xlim[0]
 min_y = ylim[0]
 min_z = zlim[0]
  
-def align_perpendicular_to_camera(object, camera):
-    view_vector = camera.matrix_world.to_quaternion() @ Vector((0, 0, 1))
-    object.rotation_euler = view_vector.to_track_quat('Z', 'Y').to_euler()
-    bpy.context.view_layer.update()
+# Open scene_construction() blocks, the object links and transforms they have queued, and
+# the view-layer updates they have avoided so far
+scene_construction_state = {"depth": 0, "links": [], "transforms": [], "avoided": 0}
+
+def link_object(obj, collection=None):
+    # Link 'obj' to 'collection' (the active collection by default) now, or when the
+    # enclosing scene_construction() block exits
+    collection = bpy.context.collection if collection is None else collection
+    if scene_construction_state["depth"]:
+        scene_construction_state["links"].append((collection, obj))
+    else:
+        collection.objects.link(obj)
+
+def apply_transform(obj, location=None, rotation=None, scale=None):
+    # Write the transform straight to location/rotation_euler/scale, without transform operators
+    if location is not None:
+        obj.location = location
+    if rotation is not None:
+        obj.rotation_euler = rotation
+    if scale is not None:
+        obj.scale = scale
+
+def set_transform(obj, location=None, rotation=None, scale=None):
+    # apply_transform() now, or when the enclosing scene_construction() block exits
+    if scene_construction_state["depth"]:
+        scene_construction_state["transforms"].append((obj, location, rotation, scale))
+    else:
+        apply_transform(obj, location, rotation, scale)
+
+@contextmanager
+def scene_construction():
+    # Scene construction block: the object links and transforms requested inside it are queued
+    # and applied when the outermost block exits, followed by exactly one view-layer update.
+    # Built with operators, every one of them evaluated the scene; the updates saved that way
+    # are added to scene_construction_state["avoided"].
+    state = scene_construction_state
+    state["depth"] += 1
+    try:
+        yield state
+    finally:
+        state["depth"] -= 1
+        if state["depth"] == 0:
+            links, transforms = state["links"], state["transforms"]
+            state["links"], state["transforms"] = [], []
+            for collection, obj in links:
+                collection.objects.link(obj)
+            for transform in transforms:
+                apply_transform(*transform)
+            bpy.context.view_layer.update()
+            state["avoided"] += max(len(links) + len(transforms) - 1, 0)
+
+def session_cache(name):
+    # Dictionary that outlives a single run of the script: it lives as long as the Blender session
+    return bpy.app.driver_namespace.setdefault(name, {})
+
+def material_alive(material):
+    # False once the datablock has been removed from bpy.data
+    try:
+        material.name
+    except ReferenceError:
+        return False
+    return True
+
+# Number of material datablocks built and reused by this run
+material_stats = {"created": 0, "reused": 0}
+
+def get_material(name, build, key=()):
+    # Every material the script builds goes through this registry. A material is cached for the
+    # session under its name and 'key' (whatever build() bakes into it, such as a colour) and is
+    # only built, by build(material), when it is missing or was deleted. Every frame, every
+    # re-run of the script and the other plot scripts then share one datablock.
+    cache = session_cache("materials")
+    cache_key = (name,) + tuple(key)
+    material = cache.get(cache_key)
+    if material is None or not material_alive(material):
+        material = bpy.data.materials.new(name=name)
+        build(material)
+        cache[cache_key] = material
+        material_stats["created"] += 1
+    else:
+        material_stats["reused"] += 1
+    return material
 
 def create_diffuse_material(mesh, colour, name):
-    material = bpy.data.materials.new(name = name)
-    material.diffuse_color = colour
-    mesh.data.materials.append(material)
-
-def normalize_function_values_1(value):
-    normalized_data = (value - min_z) / (max_z - min_z)
-    return normalized_data
-
-def normalize_function_values_2(value):
-    normalized_data = 2*((value - min_z) / (max_z - min_z)) - 1
-    return normalized_data
-
-def color_map(value, colormap, display_levels):
-    if (colormap == "Viridis" and display_levels == False):
-        value = normalize_function_values_2(value)
-        color = [0.9*exp(-((value - 1)**2)/0.08) + 0.6*exp(-((value - 0.4)**2)/0.12),
-        0.5*exp(-((value + 1)**2)/0.08) + 0.5*exp(-((value+0.5)**2)/0.2) + 0.6* exp(-((value )**2)/0.08) + 0.9*exp(-((value - 1)**2)/0.08) + 0.4*exp(-((value - 0.5)**2)/0.08), 
-        exp(-((value + 1)**2)/0.08)  + 0.8*exp(-((value+0.5)**2)/0.08)   + 0.5*exp(-((value)**2)/0.08 ), 1]
-    if (colormap == "90s" and display_levels == False):
-        value = normalize_function_values_2(value)
-        color = [0.9*exp(-((value-1)**2)/0.08) + 0.5*exp(-((value)**2)/0.02) +  0.55*exp(-((value-0.5)**2)/0.08),
-        0.99*exp(-((value)**2)/0.08) + 0.8* exp(-((value - 0.6)**2)/0.08) + 0.5* exp(-((value + 0.35)**2)/0.02), 
-        exp(-((value+0.5)**2)/0.08) + 0.5*exp(-((value)**2)/0.02), 1]
-    
-    # Jet colormap was adapted from Matplotlib: https://github.com/matplotlib/matplotlib/blob/main/lib/matplotlib/_cm.py
-    if (colormap == "Jet" and display_levels == False):
-        value = normalize_function_values_1(value)
-        if (value < 0.11):
-            color = [0,0,((1 - 0.5)/(0.11 - 0)) * value + (1 - ((1 - 0.5)/(0.11 - 0))*0.11),1]
-        elif (value < 0.125):
-            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]    
-        elif (value < 0.34):
-            color = [0,(value - 0.125) / (0.375 - 0.125),1,1]   
-        elif (value < 0.35):
-              color = [0,
-              (value - 0.125) / (0.375 - 0.125),
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.375):
-              color = [(value - 0.35) / (0.66 - 0.35),
-              (value - 0.125) / (0.375 - 0.125),
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.64):
-              color = [(value - 0.35) / (0.66 - 0.35),
-              1,
-              ((0 - 1) / (0.65 - 0.34)) * value + (1 - ((0 - 1) / (0.65 - 0.34)) * 0.34),1]
-        elif (value < 0.90):
-              color = [1,
-              1 - (value - 0.64) / (0.91 - 0.64),
-              0,1]
-        else:
-              color = [ ((0.5 - 1.0)/(1 - 0.89)) * value + (0.5 - ((0.5 - 1.0)/(1 - 0.89)) *1.0),
-              0,
-              0,
-              1]
-    return color
+    # Objects with the same material name and colour share one material datablock
+    def build(material):
+        material.diffuse_color = colour
+    mesh.data.materials.append(get_material(name, build, tuple(colour)))
+
+def purge_unused_materials():
+    # Remove the registry's materials that no longer have any users
+    cache = session_cache("materials")
+    unused = [key for key, material in cache.items() if not material_alive(material) or material.users == 0]
+    bpy.data.batch_remove([cache[key] for key in unused if material_alive(cache[key])])
+    for key in unused:
+        del cache[key]
+    return len(unused)
 
 def set_white_background():
     bpy.context.scene.render.engine = 'CYCLES'
@@ -125,25 +177,174 @@ def set_white_background():
     # Set this thing to 1
     alpha_over_node.premul = 1
 
-def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label, XoY_color, YoZ_color, XoZ_color):
-    bpy.ops.mesh.primitive_cylinder_add(radius=1, depth=1)
-    bpy.ops.transform.resize(value=(thickness, thickness, thickness))
+def axis_frame(direction):
+    # Two unit vectors perpendicular to 'direction' and to each other, (u, v, direction) right-handed
+    w = np.asarray(direction, dtype=np.float64)
+    w = w / np.linalg.norm(w)
+    helper = np.array([0, 0, 1.0]) if abs(w[2]) < 0.999 else np.array([1.0, 0, 0])
+    u = np.cross(helper, w)
+    u /= np.linalg.norm(u)
+    return u, np.cross(w, u)
+
+def cylinder_geometry(start, end, radius, segments=32):
+    # Vertices and faces of a capped cylinder of 'radius' running from point 'start' to point 'end'
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    u, v = axis_frame(end - start)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + start, ring + end])
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    sides = np.stack([i, j, j + segments, i + segments], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1], i + segments])
+    face_sizes = np.concatenate([np.full(segments, 4), [segments, segments]])
+    return vertices, corner_vertices, face_sizes
+
+def cone_geometry(base, tip, radius, segments=32):
+    # Vertices and faces of a cone with a base of 'radius' centred on 'base' and its apex at 'tip'
+    base = np.asarray(base, dtype=np.float64)
+    u, v = axis_frame(np.asarray(tip, dtype=np.float64) - base)
+    angle = 2*np.pi*np.arange(segments)/segments
+    ring = radius*(np.outer(np.cos(angle), u) + np.outer(np.sin(angle), v))
+    vertices = np.concatenate([ring + base, [tip]])
+    i = np.arange(segments)
+    sides = np.stack([i, (i + 1) % segments, np.full(segments, segments)], axis=1).ravel()
+    corner_vertices = np.concatenate([sides, i[::-1]])
+    face_sizes = np.concatenate([np.full(segments, 3), [segments]])
+    return vertices, corner_vertices, face_sizes
+
+def quad_geometry(centres, u, v):
+    # Vertices and faces of one rectangle per centre, spanning centre - u - v to centre + u + v.
+    # 'centres' is a single point or a (K,3) array of them.
+    centres = np.reshape(np.asarray(centres, dtype=np.float64), (-1, 3))
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) @ np.array([u, v], dtype=np.float64)
+    vertices = (centres[:, None, :] + corners).reshape(-1, 3)
+    return vertices, np.arange(len(vertices)), np.full(len(centres), 4)
+
+def points_along(x, y, z):
+    # (K,3) points from coordinates that are each a scalar or an array of length K
+    return np.column_stack(np.broadcast_arrays(x, y, z))
+
+def merge_geometry(parts):
+    # Concatenate (vertices, corner_vertices, face_sizes) parts into one, offsetting their indices
+    offsets = np.cumsum([0] + [len(vertices) for vertices, _, _ in parts[:-1]])
+    return (np.concatenate([vertices for vertices, _, _ in parts]),
+            np.concatenate([corners + offset for (_, corners, _), offset in zip(parts, offsets)]),
+            np.concatenate([sizes for _, _, sizes in parts]))
+
+# Axis, cone, grid line and plane geometry of the plot, grouped by (material name, colour)
+axis_geometry = {}
+
+def add_axis_geometry(material, colour, geometry):
+    axis_geometry.setdefault((material, tuple(colour)), []).append(geometry)
+
+def create_axis_objects():
+    # Build one mesh object per material out of everything create_axis() collected
+    objects = []
+    for (material, colour), parts in axis_geometry.items():
+        obj = create_mesh_object("axes." + material, *merge_geometry(parts))
+        create_diffuse_material(obj, colour, material)
+        objects.append(obj)
+    axis_geometry.clear()
+    return objects
+
+# Text of the tick labels, axis labels and title: (body, location, size, rotation) per label
+axis_labels = []
+
+def add_axis_label(body, location, size, rotation=None):
+    # 'rotation' is a 3x3 matrix; labels without one face the camera given to create_label_objects()
+    axis_labels.append((body, location, size, rotation))
+
+def camera_facing_rotation(camera):
+    # Rotation that turns text to face 'camera', as a matrix. It is read from matrix_basis,
+    # which follows camera.location and camera.rotation_euler as soon as the script sets them;
+    # matrix_world is only refreshed by the next depsgraph evaluation. The camera has no parent.
+    view_vector = camera.matrix_basis.to_quaternion() @ Vector((0, 0, 1))
+    return np.array(view_vector.to_track_quat('Z', 'Y').to_matrix())
+
+def mesh_geometry(mesh):
+    # (vertices, corner_vertices, face_sizes) of a mesh, read with foreach_get
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    corner_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_vertices)
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", face_sizes)
+    return vertices.reshape(-1, 3), corner_vertices, face_sizes
+
+def convert_font_curves(texts, font=None):
+    # Mesh geometry of unit-size text for every string in 'texts', converted from temporary font
+    # curves after a single depsgraph evaluation
+    curves = []
+    objects = []
+    for body in texts:
+        curve = bpy.data.curves.new("label", type='FONT')
+        curve.body = body
+        if font is not None:
+            curve.font = font
+        obj = bpy.data.objects.new("label", curve)
+        bpy.context.scene.collection.objects.link(obj)
+        curves.append(curve)
+        objects.append(obj)
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    meshes = [bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph)) for obj in objects]
+    geometry = [mesh_geometry(mesh) for mesh in meshes]
+    bpy.data.batch_remove(objects + curves + meshes)
+    return geometry
+
+def glyph_atlas(characters, font=None):
+    # Unit-size geometry and advance of every character of a font, kept for the whole session.
+    # Only characters that are not in the atlas yet are converted, all in one pass. The advance
+    # of a character is how far it pushes a following "|": the width of "|c|" minus that of "||".
+    glyphs = session_cache("label_glyphs").setdefault(None if font is None else font.name_full, {})
+    missing = sorted(set(characters) - set(glyphs))
+    if missing:
+        geometry = convert_font_curves(["||"] + missing + ["|%s|" % c for c in missing], font)
+        bars_width = geometry[0][0][:, 0].max()
+        for n, c in enumerate(missing):
+            framed_width = geometry[1 + len(missing) + n][0][:, 0].max()
+            glyphs[c] = geometry[1 + n] + (framed_width - bars_width,)
+    return glyphs
+
+def label_geometry(body, glyphs):
+    # Unit-size geometry of one line of text, laid out from the atlas glyphs
+    parts = []
+    x = 0.0
+    for c in body:
+        vertices, corner_vertices, face_sizes, advance = glyphs[c]
+        parts.append((vertices + (x, 0, 0), corner_vertices, face_sizes))
+        x += advance
+    return merge_geometry(parts)
+
+def create_label_objects(camera=None, font=None):
+    # Turn every collected label into one joined text mesh, assembled from the glyph atlas so
+    # only characters never used before in this session go through a font curve. The camera
+    # rotation is read once and shared by all the labels that face it (without a camera they
+    # lie in XoY).
+    labels = [label for label in axis_labels if label[0]]
+    axis_labels.clear()
+    if not labels:
+        return None
+    facing = np.eye(3) if camera is None else camera_facing_rotation(camera)
+    glyphs = glyph_atlas("".join(body for body, _, _, _ in labels), font)
+    parts = []
+    for body, location, size, rotation in labels:
+        vertices, corner_vertices, face_sizes = label_geometry(body, glyphs)
+        rotation = facing if rotation is None else np.asarray(rotation)
+        parts.append(((size*vertices) @ rotation.T + location, corner_vertices, face_sizes))
+    obj = create_mesh_object("axes.labels", *merge_geometry(parts))
+    create_diffuse_material(obj, (0, 0, 0, 1), "text_material")
+    return obj
 
+def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim, zlim, label, XoY_color, YoZ_color, XoZ_color):
     if (axis == 'X'):
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Y')
-        bpy.ops.transform.resize(value=((xlim[1]-xlim[0])/thickness, 1, 1))
-        bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0], zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")  
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=3)
-        bpy.ops.transform.rotate(value=-radians(90), orient_axis='Y')
-        bpy.ops.transform.translate(value=(xlim[1], ylim[0], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the X range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[1], ylim[0], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[1] - 4.5*thickness, ylim[0], zlim[0]),
+                                        (xlim[1] + 4.5*thickness, ylim[0], zlim[0]), 3*thickness))
 
         # Round off x coords used for text and grid lines:
         if (xlim[0] > 0):
@@ -161,71 +362,33 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xmin + xstep*N + 0.02
-                obj.location.y = ylim[1] + 0.05
-                obj.location.z = zlim[0] - 0.1
-                text_data = obj.data
-                text_data.body = str(round((xmin + xstep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((xmin + xstep*N)*10)/10), (xmin + xstep*N + 0.02, ylim[1] + 0.05, zlim[0] - 0.1), 0.12)
                 
         # Create 'xlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = 0.5*(xlim[1]+xlim[0]) * (0.95 + len(label)/10)
-        obj.location.y = ylim[1] + 0.05
-        obj.location.z = zlim[0] - 0.3
-        text_data = obj.data
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (0.5*(xlim[1]+xlim[0]) * (0.95 + len(label)/10), ylim[1] + 0.05, zlim[0] - 0.3), 0.13)
         
         
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xmin + xstep*N, ylim[0], (zlim[1]+zlim[0])*0.5 )) # anchor point
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                               
-            for N in range(1,5):
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xmin + xstep*N, (ylim[1]+ylim[0])*0.5, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-            
-            # Add the plane XoY:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], ylim[1]-ylim[0], 1))                
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, XoY_color, "plane_material")
+            # Lines up the XoZ plane and across the XoY plane at every tick, then the XoY plane
+            x = xmin + xstep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, ylim[0], 0.5*(zlim[1]+zlim[0])),
+                                            (0.25*thickness, 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(x, 0.5*(ylim[1]+ylim[0]), zlim[0]),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", XoY_color,
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), 0.5*(ylim[1]+ylim[0]), zlim[0]-0.01),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
                             
     elif (axis == 'Y'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.resize(value=(1, (ylim[1]-ylim[0])/thickness, 1))
-        bpy.ops.transform.translate(value=(xlim[0], 0.5*(ylim[1]+ylim[0]), zlim[0]))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='X')
-        bpy.ops.transform.translate(value=(xlim[0], ylim[1], zlim[0]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")   
+        # Axis along the Y range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[1], zlim[0]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[1] - 3*thickness, zlim[0]),
+                                        (xlim[0], ylim[1] + 3*thickness, zlim[0]), 3*thickness))
 
         # Round off y coords used for text and grid lines:
         if (ylim[0] > 0):
@@ -243,71 +406,32 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the Y-axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[1] + 0.02
-                obj.location.y = ymin + ystep*N - 0.2
-                obj.location.z = zlim[0] - 0.2
-                text_data = obj.data
-                text_data.body = str(round((ymin + ystep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((ymin + ystep*N)*10)/10), (xlim[1] + 0.02, ymin + ystep*N - 0.2, zlim[0] - 0.2), 0.12)
                 
         # Create 'ylabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[1] + 0.07
-        obj.location.y = 0.5*(ylim[1]+ylim[0]) - 0.3
-        obj.location.z = zlim[0] - 0.4
-        text_data = obj.data
-        text_data.body = label   
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
+        add_axis_label(label, (xlim[1] + 0.07, 0.5*(ylim[1]+ylim[0]) - 0.3, zlim[0] - 0.4), 0.13)
             
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,5): # Add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-                bpy.ops.transform.resize(value=(0.5*thickness, 0.5*thickness, zlim[1]-zlim[0]))
-                bpy.ops.transform.translate(value=(xlim[0], ymin + ystep*N, (zlim[1]+zlim[0])*0.5))
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                
-            for N in range(1,5): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))                
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ymin + ystep*N, zlim[0])) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-           
-            # Add the plane YoZ:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(zlim[1]-zlim[0], ylim[1]-ylim[0], 1))    
-            bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)              
-            bpy.ops.transform.translate(value=(xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, YoZ_color, "plane_material")   
+            # Lines up the YoZ plane and across the XoY plane at every tick, then the YoZ plane
+            y = ymin + ystep*np.arange(1, 5)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], y, 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.25*thickness, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), y, zlim[0]),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("plane_material", YoZ_color,
+                              quad_geometry((xlim[0]-0.01, 0.5*(ylim[1]+ylim[0]), 0.5*(zlim[1]+zlim[0])),
+                                            (0, 0.5*(ylim[1]-ylim[0]), 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
                  
     elif (axis == 'Z'):  
-        bpy.ops.transform.rotate(value=radians(90), orient_axis='Z')
-        bpy.ops.transform.resize(value=(1, 1, (zlim[1]-zlim[0])/thickness))
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], 0.5*(zlim[1]+zlim[0])))
-        # Set the X-axis to red
-        axis_cilinder = bpy.context.active_object
-        create_diffuse_material(axis_cilinder, colour, "axis_material")         
-        #Add axis arrow
-        bpy.ops.mesh.primitive_cone_add(radius1=1, radius2=0, depth=2)
-        bpy.ops.transform.rotate(value=radians(90), orient_axis=axis)
-        bpy.ops.transform.translate(value=(xlim[0], ylim[0], zlim[1]))
-        bpy.ops.transform.resize(value=(3*thickness, 3*thickness, 3*thickness))
-        # Set the cone to red
-        cone = bpy.context.active_object
-        create_diffuse_material(cone, colour, "cone_material")
+        # Axis along the Z range and the arrow cone centred on its end, pointing outward
+        add_axis_geometry("axis_material", colour,
+                          cylinder_geometry((xlim[0], ylim[0], zlim[0]), (xlim[0], ylim[0], zlim[1]), thickness))
+        add_axis_geometry("cone_material", colour,
+                          cone_geometry((xlim[0], ylim[0], zlim[1] - 3*thickness),
+                                        (xlim[0], ylim[0], zlim[1] + 3*thickness), 3*thickness))
 
         # Round off z coords used for text and grid lines:
         if (zlim[0] > 0):
@@ -325,102 +449,293 @@ def create_axis(axis, colour, thickness, display_grid, display_tick, xlim, ylim,
         if display_tick == True:
             # Add the axis labels text:
             for N in range(1,5):   
-                bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                obj = bpy.context.active_object
-                obj.location.x = xlim[1] + 0.05
-                obj.location.y = ylim[0] - 0.3
-                obj.location.z = zmin + zstep*N - 0.10
-                text_data = obj.data
-                text_data.body = str(round((zmin + zstep*N)*10)/10)    
-                text_data.size = 0.12
-                text = bpy.context.active_object
-                align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-                create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+                add_axis_label(str(round((zmin + zstep*N)*10)/10), (xlim[1] + 0.05, ylim[0] - 0.3, zmin + zstep*N - 0.10), 0.12)
             
         # Create 'zlabel':
-        bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-        obj = bpy.context.active_object
-        obj.location.x = xlim[1] + 0.05
-        obj.location.y = ylim[0]  - 0.7*(0.8 + len(label)/10)
-        obj.location.z = 0.5*(zlim[1] + zlim[0]) * 1.1
-        text_data = obj.data
-        text_data.body = label    
-        text_data.size = 0.13
-        text = bpy.context.active_object
-        align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-        create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+        add_axis_label(label, (xlim[1] + 0.05, ylim[0]  - 0.7*(0.8 + len(label)/10), 0.5*(zlim[1] + zlim[0]) * 1.1), 0.13)
                           
         #Add the auxaliary grid lines and corresponding planes:
         if display_grid == True:
-            for N in range(1,4): #add the lines
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(xlim[1]-xlim[0], 0.5*thickness, 1))
-                bpy.ops.transform.translate(value=((xlim[1]+xlim[0])*0.5, ylim[0], zmin + zstep*N)) 
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")
-                                    
-            for N in range(1,4): 
-                bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-                bpy.ops.transform.resize(value=(0.5*thickness, ylim[1]-ylim[0], 1))                
-                bpy.ops.transform.translate(value=(xlim[0], (ylim[1]+ylim[0])*0.5, zmin + zstep*N))  
-                line = bpy.context.active_object
-                create_diffuse_material(line, (0.1, 0.1, 0.1, 1), "line_material")                            
-            
-            #add the XoZ plane:
-            bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-            bpy.ops.transform.resize(value=(xlim[1]-xlim[0], zlim[1]-zlim[0], 1))  
-            bpy.ops.transform.rotate(value=radians(90), orient_axis='X')              
-            bpy.ops.transform.translate(value=(0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])))
-            plane = bpy.context.active_object
-            create_diffuse_material(plane, XoZ_color, "plane_material")   
+            # Flat lines along the back edges of the XoY plane at every tick, then the XoZ plane
+            z = zmin + zstep*np.arange(1, 4)
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(0.5*(xlim[1]+xlim[0]), ylim[0], z),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0.25*thickness, 0)))
+            add_axis_geometry("line_material", (0.1, 0.1, 0.1, 1),
+                              quad_geometry(points_along(xlim[0], 0.5*(ylim[1]+ylim[0]), z),
+                                            (0.25*thickness, 0, 0), (0, 0.5*(ylim[1]-ylim[0]), 0)))
+            add_axis_geometry("plane_material", XoZ_color,
+                              quad_geometry((0.5*(xlim[1]+xlim[0]), ylim[0]-0.01, 0.5*(zlim[1]+zlim[0])),
+                                            (0.5*(xlim[1]-xlim[0]), 0, 0), (0, 0, 0.5*(zlim[1]-zlim[0]))))
 
 def set_title(label):
-    bpy.ops.object.text_add(enter_editmode=False, align='WORLD', location=(0, 0, 0), scale=(1, 1, 1))
-    obj = bpy.context.active_object
-    obj.location.x = xlim[0] + 0.05
-    obj.location.y = ylim[0] - 0.35
-    obj.location.z = zlim[1] * 1.3
-    text_data = obj.data
-    text_data.body = label    
-    text_data.size = 0.15
-    text = bpy.context.active_object
-    align_perpendicular_to_camera(text, bpy.data.objects.get("Camera"))
-    create_diffuse_material(text, (0, 0, 0, 1), "text_material")
+    add_axis_label(label, (xlim[0] + 0.05, ylim[0] - 0.35, zlim[1] * 1.3), 0.15)
 
 def draw_vector(start_point, direction, length, thickness, colour):
-    bpy.ops.mesh.primitive_cylinder_add(radius=1, depth=1)
-    bpy.ops.transform.resize(value=(thickness, thickness, 0.5*length))
-    bpy.ops.transform.translate(value=(start_point[0], start_point[1], start_point[2]))
-    cylinder = bpy.context.object
-    cylinder.name = "vector.body"
+    # Arrow of two objects: the radius 1, depth 1 cylinder of primitive_cylinder_add() scaled to
+    # the body and the cone of primitive_cone_add(), built from numpy arrays. Their links and
+    # transforms go through link_object() and set_transform(), so inside scene_construction()
+    # they wait for the single update at the end of the block.
     direction = Vector(direction).normalized()
-    
-    # Set the orientation of the vector cilinder
-    rot_quat = direction.to_track_quat('Z', 'Y')
-    cylinder.rotation_euler = rot_quat.to_euler()
+    # Set the orientation of the vector
+    rotation = direction.to_track_quat('Z', 'Y').to_euler()
 
+    cylinder = create_mesh_object("vector.body", *cylinder_geometry((0, 0, -0.5), (0, 0, 0.5), 1))
+    set_transform(cylinder, location=start_point, rotation=rotation, scale=(thickness, thickness, 0.5*length))
     # Set the colour for the vector cilinder
-    vector_cilinder = bpy.context.active_object
-    create_diffuse_material(vector_cilinder, colour, "vector_material")  
+    create_diffuse_material(cylinder, colour, "vector_material")
     # Add vector arrow
-    bpy.ops.mesh.primitive_cone_add(radius1=30*thickness, radius2=0, depth=60*thickness)
-    bpy.ops.transform.translate(value=(start_point[0] + direction[0] * 0.4 * length, 
-                                       start_point[1] + direction[1] * 0.4 * length, 
-                                       start_point[2] + direction[2] * 0.4 * length))
-    bpy.ops.transform.resize(value=(10*thickness, 10*thickness, 10*thickness))
-    cone = bpy.context.object
-    cone.name = "vector.head"
-    direction = Vector(direction).normalized()
-    
-    # Set the orientation of the Arrow
-    rot_quat = direction.to_track_quat('Z', 'Y')
-    cone.rotation_euler = rot_quat.to_euler()
+    cone = create_mesh_object("vector.head", *cone_geometry((0, 0, -30*thickness), (0, 0, 30*thickness), 30*thickness))
+    set_transform(cone,
+                  location=(start_point[0] + direction[0] * 0.4 * length,
+                            start_point[1] + direction[1] * 0.4 * length,
+                            start_point[2] + direction[2] * 0.4 * length),
+                  rotation=rotation,
+                  scale=(10*thickness, 10*thickness, 10*thickness))
     # Set the arrow colour
-    cone = bpy.context.active_object
-    create_diffuse_material(cone, colour, "cone_material")    
-
-def differentiate (x1, x2, dt):
-    return (x1 - x2)/dt
+    create_diffuse_material(cone, colour, "cone_material")
+
+def create_mesh_object(name, vertices, corner_vertices, face_sizes):
+    # Build a mesh straight from numpy arrays: (V,3) vertex coordinates, the vertex index of
+    # every face corner and the number of corners of every face. No operators are involved.
+    face_sizes = np.asarray(face_sizes, dtype=np.int32)
+    loop_start = np.zeros(len(face_sizes), dtype=np.int32)
+    np.cumsum(face_sizes[:-1], out=loop_start[1:])
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.loops.add(len(corner_vertices))
+    mesh.polygons.add(len(face_sizes))
+    mesh.vertices.foreach_set("co", np.asarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.asarray(corner_vertices, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    # Newer Blender versions derive the face sizes from loop_start
+    if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+    mesh.update(calc_edges=True)
+    obj = bpy.data.objects.new(name, mesh)
+    link_object(obj)
+    return obj
+
+def arrow_geometry(length, thickness, segments=32):
+    # Vertices and faces of the arrow draw_vector() builds, pointing along +Z with the origin at
+    # the centre of its body: the depth 1 cylinder scaled to radius 'thickness' and depth
+    # 0.5*length, plus the cone head, which draw_vector() adds with radius 30*thickness and
+    # depth 60*thickness, scales by 10*thickness and centres at 0.4*length
+    angle = 2*pi*np.arange(segments)/segments
+    ring = np.stack([np.cos(angle), np.sin(angle), np.zeros(segments)], axis=1)
+    head_radius = 300*thickness**2
+    head_depth = 600*thickness**2
+    head_centre = 0.4*length
+    vertices = np.concatenate([ring*thickness + [0, 0, -0.25*length],
+                               ring*thickness + [0, 0, 0.25*length],
+                               ring*head_radius + [0, 0, head_centre - 0.5*head_depth],
+                               [[0, 0, head_centre + 0.5*head_depth]]])
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    body_sides = np.stack([i, j, j + segments, i + segments], axis=1).ravel()
+    head_sides = np.stack([i + 2*segments, j + 2*segments, np.full(segments, 3*segments)], axis=1).ravel()
+    corner_vertices = np.concatenate([body_sides, head_sides, i[::-1], i + segments, (i + 2*segments)[::-1]])
+    face_sizes = np.concatenate([np.full(segments, 4), np.full(segments, 3), [segments, segments, segments]])
+    return vertices, corner_vertices, face_sizes
+
+def directions_to_euler(directions):
+    # XYZ Euler angles of rotations taking +Z onto every direction. The arrows are symmetric
+    # around their axis, so any roll around it gives the same glyph.
+    norm = np.linalg.norm(directions, axis=1, keepdims=True)
+    z_axis = np.where(norm > 0, directions / np.where(norm > 0, norm, 1), [0, 0, 1])
+    helper = np.where(np.abs(z_axis[:, 2:]) < 0.999, [0, 0, 1], [1, 0, 0])
+    x_axis = np.cross(helper, z_axis)
+    x_axis /= np.linalg.norm(x_axis, axis=1, keepdims=True)
+    y_axis = np.cross(z_axis, x_axis)
+    return np.stack([np.arctan2(y_axis[:, 2], z_axis[:, 2]),
+                     np.arcsin(np.clip(-x_axis[:, 2], -1, 1)),
+                     np.arctan2(x_axis[:, 1], x_axis[:, 0])], axis=1)
+
+def named_attribute_socket(nodes, name, data_type):
+    # Output socket of a Named Attribute node reading 'name' as 'data_type'
+    node = nodes.new(type='GeometryNodeInputNamedAttribute')
+    node.data_type = data_type
+    node.inputs["Name"].default_value = name
+    return [socket for socket in node.outputs if socket.enabled][0]
+
+def create_glyph_object(name, arrow_object):
+    # Vertex-only mesh with one point per glyph. A Geometry Nodes modifier instances the arrow
+    # on every point, oriented and scaled by the "rotation" and "scale" point attributes.
+    obj = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+    bpy.context.collection.objects.link(obj)
+    group = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    # Blender 4.0 declares the group sockets on its interface, older versions on the group
+    if hasattr(group, "interface"):
+        group.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+        group.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    else:
+        group.inputs.new('NodeSocketGeometry', "Geometry")
+        group.outputs.new('NodeSocketGeometry', "Geometry")
+    nodes = group.nodes
+    group_input = nodes.new(type='NodeGroupInput')
+    group_output = nodes.new(type='NodeGroupOutput')
+    arrow_info = nodes.new(type='GeometryNodeObjectInfo')
+    arrow_info.inputs["Object"].default_value = arrow_object
+    instance_node = nodes.new(type='GeometryNodeInstanceOnPoints')
+    group.links.new(group_input.outputs[0], instance_node.inputs["Points"])
+    group.links.new(arrow_info.outputs["Geometry"], instance_node.inputs["Instance"])
+    group.links.new(named_attribute_socket(nodes, "rotation", 'FLOAT_VECTOR'), instance_node.inputs["Rotation"])
+    group.links.new(named_attribute_socket(nodes, "scale", 'FLOAT_VECTOR'), instance_node.inputs["Scale"])
+    group.links.new(instance_node.outputs["Instances"], group_output.inputs[0])
+    obj.modifiers.new(name, 'NODES').node_group = group
+    return obj
+
+def build_glyph_material(material):
+    # Diffuse material coloured by the "colour" attribute of each glyph instance
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    for node in nodes:
+        nodes.remove(node)
+    attribute_node = nodes.new(type='ShaderNodeAttribute')
+    attribute_node.attribute_type = 'INSTANCER'
+    attribute_node.attribute_name = "colour"
+    diffuse_node = nodes.new(type='ShaderNodeBsdfDiffuse')
+    diffuse_node.location = (300, 0)
+    output_node = nodes.new(type='ShaderNodeOutputMaterial')
+    output_node.location = (500, 0)
+    material.node_tree.links.new(attribute_node.outputs["Color"], diffuse_node.inputs["Color"])
+    material.node_tree.links.new(diffuse_node.outputs["BSDF"], output_node.inputs["Surface"])
+
+def write_point_attribute(mesh, name, data_type, values):
+    # Bulk write of a point domain attribute, created on first use
+    attribute = mesh.attributes.get(name)
+    if attribute is None:
+        attribute = mesh.attributes.new(name, data_type, 'POINT')
+    field = "color" if data_type == 'FLOAT_COLOR' else "vector"
+    attribute.data.foreach_set(field, np.asarray(values, dtype=np.float32).ravel())
+
+def update_glyphs(glyph_object, positions, directions, colour, scales=None):
+    # Place one arrow per row of the (N,3) position/direction arrays with a handful of bulk writes.
+    # 'colour' is one RGBA for every glyph or an (N,4) array; 'scales' defaults to 1.
+    mesh = glyph_object.data
+    count = len(positions)
+    if len(mesh.vertices) != count:
+        mesh.clear_geometry()
+        mesh.vertices.add(count)
+    mesh.vertices.foreach_set("co", np.asarray(positions, dtype=np.float32).ravel())
+    write_point_attribute(mesh, "rotation", 'FLOAT_VECTOR', directions_to_euler(np.asarray(directions, dtype=np.float64)))
+    write_point_attribute(mesh, "scale", 'FLOAT_VECTOR', np.ones((count, 3)) if scales is None else np.broadcast_to(scales, (count, 3)))
+    write_point_attribute(mesh, "colour", 'FLOAT_COLOR', np.broadcast_to(colour, (count, 4)))
+    mesh.update()
+
+def sample_glyphs(points, tangents, step, stride, count, lower, upper, direction_offset=0):
+    # Positions and directions of the glyphs of one frame, for a curve (N,3) or a family (L,N,3).
+    # Glyph N of every curve sits on sample stride*N + step and points along tangent
+    # stride*N + step + direction_offset. Only glyphs strictly between the per-axis (x, y, z)
+    # 'lower' and 'upper' limits are kept; None disables a limit.
+    index = stride*np.arange(count) + step
+    positions = points[..., index, :].reshape(-1, 3)
+    directions = tangents[..., index + direction_offset, :].reshape(-1, 3)
+    inside = np.ones(len(positions), dtype=bool)
+    for axis in range(3):
+        if lower[axis] is not None:
+            inside &= positions[:, axis] > lower[axis]
+        if upper[axis] is not None:
+            inside &= positions[:, axis] < upper[axis]
+    return np.ascontiguousarray(positions[inside]), np.ascontiguousarray(directions[inside])
+
+def extend_glyph_tracks(points, tangents, stride, count, last_step, direction_offset=0, mode="raise"):
+    # Checks, before anything is rendered, that every frame up to 'last_step' can sample its
+    # glyphs from the curve (N,3) or family (L,N,3). The tangents are first padded with their last
+    # value to the length of the points (forward differences are one sample shorter). When the
+    # last frames would read past the end of the curves, mode "raise" raises a ValueError naming
+    # the first such frame, "pad" holds the last sample and "wrap" continues from the start.
+    if mode not in ("raise", "pad", "wrap"):
+        raise ValueError("Unknown overflow mode %r" % (mode,))
+    def extend(values, extra, how):
+        pad_width = [(0, 0)]*values.ndim
+        pad_width[-2] = (0, extra)
+        return np.pad(values, pad_width, mode=how)
+    num_samples = points.shape[-2]
+    if tangents.shape[-2] < num_samples:
+        tangents = extend(tangents, num_samples - tangents.shape[-2], "edge")
+    last_index = stride*(count - 1) + last_step + direction_offset
+    if last_index < num_samples:
+        return points, tangents
+    if mode == "raise":
+        first_frame = num_samples - stride*(count - 1) - direction_offset
+        raise ValueError("Frame %d samples past the end of the curves (%d samples); use fewer "
+                         "frames or vectors, a smaller spacing, or the 'pad'/'wrap' overflow mode"
+                         % (first_frame, num_samples))
+    how = "edge" if mode == "pad" else "wrap"
+    extra = last_index + 1 - num_samples
+    return extend(points, extra, how), extend(tangents, extra, how)
+
+def object_collection(name):
+    # Collection that keeps track of the objects drawn for one frame, linked to the scene on first use
+    collection = bpy.data.collections.get(name)
+    if collection is None:
+        collection = bpy.data.collections.new(name)
+        bpy.context.scene.collection.children.link(collection)
+    return collection
+
+def remove_collection_objects(collection):
+    # Remove every object of the collection together with its mesh in a single batch
+    objects = list(collection.objects)
+    meshes = {obj.data for obj in objects if obj.type == 'MESH'}
+    bpy.data.batch_remove(objects + list(meshes))
+    return len(objects)
+
+# Objects reused from the glyph pool (hits) and created for it (misses)
+glyph_pool_stats = {"hits": 0, "misses": 0}
+
+def update_glyph_pool(collection, arrow_mesh, positions, directions):
+    # Keeps one object per visible vector alive in 'collection', all sharing 'arrow_mesh', and
+    # moves them with bulk writes. Objects are only created when more vectors are visible than
+    # the pool holds; the ones a frame does not need are hidden until a later frame needs them.
+    objects = collection.objects
+    count = len(positions)
+    glyph_pool_stats["hits"] += min(count, len(objects))
+    glyph_pool_stats["misses"] += max(count - len(objects), 0)
+    for i in range(len(objects), count):
+        objects.link(bpy.data.objects.new("vector.glyph", arrow_mesh))
+    size = len(objects)
+    locations = np.zeros((size, 3), dtype=np.float32)
+    locations[:count] = positions
+    rotations = np.zeros((size, 3), dtype=np.float32)
+    rotations[:count] = directions_to_euler(np.asarray(directions, dtype=np.float64))
+    hidden = np.arange(size) >= count
+    objects.foreach_set("location", locations.ravel())
+    objects.foreach_set("rotation_euler", rotations.ravel())
+    objects.foreach_set("hide_render", hidden)
+    objects.foreach_set("hide_viewport", hidden)
+
+def sample_curve(x, y, z, t, dtype=np.float64):
+    # x(t), y(t), z(t) are numpy-broadcastable callables or expression strings in 't'.
+    # Every component is evaluated over the whole 't' array in a single pass.
+    namespace = {name: getattr(np, name) for name in ("sin", "cos", "tan", "exp", "log", "sqrt",
+                                                      "sinh", "cosh", "tanh", "abs", "pi", "e")}
+    namespace["__builtins__"] = {}
+    points = np.empty((len(t), 3), dtype=dtype)
+    for i, component in enumerate((x, y, z)):
+        if isinstance(component, str):
+            points[:, i] = eval(component, namespace, {"t": t})
+        else:
+            points[:, i] = component(t)
+    return points
+
+def differentiate_curve(points, dt, scheme="forward"):
+    # Tangents along the samples of an (N,3) curve or an (L,N,3) family of curves in one call.
+    # "forward" gives the N-1 tangents (p[N+1] - p[N])/dt, the same values and sign as the old
+    # per-sample -differentiate(p[N], p[N+1], dt). "central" (second order) and "central4"
+    # (fourth order inside, second order near the ends) give N tangents.
+    # For exact tangents sample the derivative of the curve instead (tangent_scheme "analytic").
+    points = np.asarray(points, dtype=np.float64)
+    if scheme == "forward":
+        return np.diff(points, axis=-2) / dt
+    if scheme == "central":
+        return np.gradient(points, dt, axis=-2, edge_order=2)
+    if scheme == "central4":
+        tangents = np.gradient(points, dt, axis=-2, edge_order=2)
+        tangents[..., 2:-2, :] = (points[..., :-4, :] - 8*points[..., 1:-3, :]
+                                  + 8*points[..., 3:-1, :] - points[..., 4:, :]) / (12*dt)
+        return tangents
+    raise ValueError("Unknown differentiation scheme: %s" % scheme)
 
 # Set ambient light colour
 bpy.data.worlds["World"].node_tree.nodes["Background"].inputs[0].default_value = (0.80, 0.80, 0.80, 1)
@@ -435,46 +750,54 @@ camera.location.z = (zlim[1] - zlim[0])*1*6.336805 * cos(camera.rotation_euler.x
 set_white_background()
 
 
-create_axis('X', 
-            colour_x_axis, 
-            thickness_x_axis, 
-            display_grid,
-            display_tick, 
-            xlim, 
-            ylim, 
-            zlim,
-            label_x_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-create_axis('Y', 
-            colour_y_axis, 
-            thickness_y_axis, 
-            display_grid,
-            display_tick,  
-            xlim, 
-            ylim, 
-            zlim,
-            label_y_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-create_axis('Z', 
-            colour_z_axis, 
-            thickness_z_axis, 
-            display_grid,
-            display_tick, 
-            xlim, 
-            ylim, 
-            zlim,
-            label_z_axis,
-            XoY_color,
-            YoZ_color,
-            XoZ_color) 
-
-set_title(title_plot)
+# Object links and transforms wait for a single view-layer update at the end
+with scene_construction():
+    create_axis('X', 
+                colour_x_axis, 
+                thickness_x_axis, 
+                display_grid,
+                display_tick, 
+                xlim, 
+                ylim, 
+                zlim,
+                label_x_axis,
+                XoY_color,
+                YoZ_color,
+                XoZ_color) 
+
+    create_axis('Y', 
+                colour_y_axis, 
+                thickness_y_axis, 
+                display_grid,
+                display_tick,  
+                xlim, 
+                ylim, 
+                zlim,
+                label_y_axis,
+                XoY_color,
+                YoZ_color,
+                XoZ_color) 
+
+    create_axis('Z', 
+                colour_z_axis, 
+                thickness_z_axis, 
+                display_grid,
+                display_tick, 
+                xlim, 
+                ylim, 
+                zlim,
+                label_z_axis,
+                XoY_color,
+                YoZ_color,
+                XoZ_color) 
+
+    # Turn the collected axis geometry into one object per material
+    create_axis_objects()
+
+    set_title(title_plot)
+
+    # Join every label and the title into one text mesh
+    create_label_objects(bpy.data.objects.get("Camera"))
      
 #### NOW CREATE THE 3D CONTOUR PLOT ANIMATION ################
 
@@ -482,55 +805,87 @@ set_title(title_plot)
 dt = 0.001
 t = arange(-1.5, 3, dt)
 
-# Allocate space for curve coordinates
-points = zeros((len(t), 3))
-points_diff = zeros((len(t) - 1, 3))
-
-
 # Define line x(t),y(t),z(t) equation:
-for N in range(len(t)):
-    x = (cosh(t[N])     * cos(10 * t[N]))* cos(2 * t[N])
-    y = (cosh(1 - t[N]) * sin(10 * t[N]))* cos(2 * t[N])
-    z = (t[N])* cos(0.2 * t[N])
-    points[N] = [x, y, z]
-
-# Automatically calculate the diff of whatever equation user has defined.
-for N in range(len(t) - 1):
-    dx = -differentiate(points[N, 0], points[N+1, 0], dt)
-    dy = -differentiate(points[N, 1], points[N+1, 1], dt)
-    dz = -differentiate(points[N, 2], points[N+1, 2], dt)
-    points_diff[N] = [dx, dy, dz]
- 
+points = sample_curve(lambda t: (np.cosh(t)     * np.cos(10 * t))* np.cos(2 * t),
+                      lambda t: (np.cosh(1 - t) * np.sin(10 * t))* np.cos(2 * t),
+                      lambda t: (t)* np.cos(0.2 * t),
+                      t)
+
+if tangent_scheme == "analytic":
+    # dx/dt, dy/dt, dz/dt of the line above, sampled like the line itself
+    points_diff = sample_curve(lambda t: np.sinh(t) * np.cos(10 * t) * np.cos(2 * t)
+                                         - 10 * np.cosh(t) * np.sin(10 * t) * np.cos(2 * t)
+                                         - 2 * np.cosh(t) * np.cos(10 * t) * np.sin(2 * t),
+                               lambda t: -np.sinh(1 - t) * np.sin(10 * t) * np.cos(2 * t)
+                                         + 10 * np.cosh(1 - t) * np.cos(10 * t) * np.cos(2 * t)
+                                         - 2 * np.cosh(1 - t) * np.sin(10 * t) * np.sin(2 * t),
+                               lambda t: np.cos(0.2 * t) - 0.2 * t * np.sin(0.2 * t),
+                               t)
+else:
+    # Automatically calculate the diff of whatever equation user has defined.
+    points_diff = differentiate_curve(points, dt, tangent_scheme)
 
 max_animation_step = 2
 
+# Make sure every frame has curve samples for all of its vectors before rendering any
+points, points_diff = extend_glyph_tracks(points, points_diff, 25, 160, max_animation_step - 1,
+                                          direction_offset=1, mode=overflow_mode)
+
 length = 0.2
 thickness = 0.01
 colour = (0.1, 0.2, 1, 1)
 
+if glyph_mode in ("instances", "pool"):
+    # One arrow mesh shared by every vector, either as instances on the points of the glyph
+    # object or as the data of every object of the pool
+    arrow_object = create_mesh_object("vector.arrow", *arrow_geometry(length, thickness))
+    arrow_object.hide_render = True
+    arrow_object.hide_set(True)
+if glyph_mode == "instances":
+    arrow_object.data.materials.append(get_material("vector_glyph_material", build_glyph_material))
+    glyph_object = create_glyph_object("vectors", arrow_object)
+elif glyph_mode == "pool":
+    create_diffuse_material(arrow_object, colour, "vector_material")
+    glyph_pool = object_collection("vectors.pool")
+else:
+    # Every frame's vector objects live in their own collection
+    vector_collection = object_collection("vectors.frame")
+
 for step in range(1, max_animation_step):
-       
-    for N in range(160):
-        # the 25*N represents a 25 unit spacing between vectors
-        start_point = (points[25*N + step,0], 
-                       points[25*N + step,1], 
-                       points[25*N + step,2])
-        direction = (points_diff[25*N+1 + step,0], 
-                     points_diff[25*N+1 + step,1], 
-                     points_diff[25*N+1 + step,2])
-        # draw the vector if it lies between min_z and max_z
-        if (points[25*N + step,2] > min_z and points[25*N + step,2] < max_z + 0.10):
-            draw_vector(start_point, direction, length, thickness, colour)
-    
+
+    # the 25*N represents a 25 unit spacing between vectors
+    # draw the vector if it lies between min_z and max_z
+    start_points, directions = sample_glyphs(points, points_diff, step, 25, 160,
+                                             (None, None, min_z), (None, None, max_z + 0.10),
+                                             direction_offset=1)
+
+    if glyph_mode == "instances":
+        update_glyphs(glyph_object, start_points, directions, colour)
+    elif glyph_mode == "pool":
+        update_glyph_pool(glyph_pool, arrow_object.data, start_points, directions)
+    else:
+        # New objects go to the vector collection while it is the active one
+        view_layer = bpy.context.view_layer
+        view_layer.active_layer_collection = view_layer.layer_collection.children[vector_collection.name]
+        # The frame's arrows are linked and placed with one view-layer update
+        with scene_construction():
+            for start_point, direction in zip(start_points, directions):
+                draw_vector(start_point, direction, length, thickness, colour)
+        view_layer.active_layer_collection = view_layer.layer_collection
+
     # CHANGE THE NAME OF THE FILEPATH!!!
     bpy.context.scene.render.filepath = '/home/pinto/Pictures/H/Frame_%d.jpg' % step
     bpy.ops.render.render(write_still=True);
 
-    # Delete the vectors before next animation loop or else they will be drawn again:
-    for obj in bpy.context.scene.objects:
-        if obj.type == 'MESH' and (obj.name.startswith("vector.body") or obj.name.startswith("vector.head")):
-            obj.select_set(True)
+    if glyph_mode == "objects":
+        # Delete the vectors before next animation loop or else they will be drawn again:
+        remove_collection_objects(vector_collection)
+
+if glyph_mode == "pool":
+    print("Glyph pool: %d hits, %d misses" % (glyph_pool_stats["hits"], glyph_pool_stats["misses"]))
 
-    bpy.ops.object.delete()
-    
+# Drop the cached materials that nothing uses any more
+purge_unused_materials()
 
+print("Materials: %d created, %d reused" % (material_stats["created"], material_stats["reused"]))
+print("Scene construction: %d view-layer updates avoided" % scene_construction_state["avoided"])
@@ -0,0 +1,52 @@
+# Checks that arrow_geometry(), the shared arrow mesh of the "instances" and "pool" glyph modes,
+# has the proportions of the arrow draw_vector() builds in "objects" mode, in both vector
+# scripts. Runs outside Blender: only numpy is needed.
+import ast
+import os
+import numpy as np
+from numpy import pi
+
+def load_functions(script, names, namespace):
+    # Compile the top-level functions 'names' of 'script' into 'namespace' straight from its
+    # source, so the shipped code is checked without running the rest of the script (which
+    # needs Blender)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in functions}
+    if missing:
+        raise LookupError("%s has no function %s" % (script, ", ".join(sorted(missing))))
+    exec(compile(ast.Module(body=functions, type_ignores=[]), path, "exec"), namespace)
+
+# Both vector scripts ship arrow_geometry()
+scripts = ["animated_vortex_3D.py", "../06 - 2D Animated vector field/vector_field_2D.py"]
+
+def draw_vector_extents(length, thickness):
+    # (radius, z min, z max) of the body and the head of draw_vector()'s arrow along its direction:
+    # primitive_cylinder_add(radius=1, depth=1) scaled by (thickness, thickness, 0.5*length), and
+    # primitive_cone_add(radius1=30*thickness, depth=60*thickness) scaled by 10*thickness and
+    # moved 0.4*length along the direction
+    body = (thickness, -0.5*0.5*length, 0.5*0.5*length)
+    head_radius = 30*thickness*10*thickness
+    head_depth = 60*thickness*10*thickness
+    head = (head_radius, 0.4*length - 0.5*head_depth, 0.4*length + 0.5*head_depth)
+    return body, head
+
+def part_extents(vertices):
+    return (np.hypot(vertices[:, 0], vertices[:, 1]).max(), vertices[:, 2].min(), vertices[:, 2].max())
+
+segments = 32
+for script in scripts:
+    namespace = {"np": np, "pi": pi}
+    load_functions(script, ["arrow_geometry"], namespace)
+    arrow_geometry = namespace["arrow_geometry"]
+    print(os.path.basename(script))
+    for length, thickness in [(0.2, 0.01), (0.5, 0.02), (1.0, 0.005)]:
+        vertices, corner_vertices, face_sizes = arrow_geometry(length, thickness, segments)
+        body, head = draw_vector_extents(length, thickness)
+        assert np.allclose(part_extents(vertices[:2*segments]), body), (script, length, thickness)
+        assert np.allclose(part_extents(vertices[2*segments:]), head), (script, length, thickness)
+        assert face_sizes.sum() == len(corner_vertices) and corner_vertices.max() < len(vertices)
+        print("  length %.3f, thickness %.3f: body z %+.4f..%+.4f, head z %+.4f..%+.4f" % (length, thickness, body[1], body[2], head[1], head[2]))
+print("arrow_geometry() matches draw_vector()")
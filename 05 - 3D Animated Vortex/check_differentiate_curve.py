@@ -0,0 +1,141 @@
+# Checks differentiate_curve(), the vectorized tangents of the vector scripts, against the
+# per-sample loop it replaced, the accuracy of its "central" and "central4" schemes, and the
+# "analytic" tangents each script samples from the derivative of its own curves. Runs outside
+# Blender: only numpy is needed.
+import ast
+import os
+import numpy as np
+
+def script_tree(script):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    with open(path) as f:
+        return ast.parse(f.read(), path), path
+
+def load_functions(script, names, namespace):
+    # Compile the top-level functions 'names' of 'script' into 'namespace' straight from its
+    # source, so the shipped code is checked without running the rest of the script (which
+    # needs Blender)
+    tree, path = script_tree(script)
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in functions}
+    if missing:
+        raise LookupError("%s has no function %s" % (script, ", ".join(sorted(missing))))
+    exec(compile(ast.Module(body=functions, type_ignores=[]), path, "exec"), namespace)
+
+def run_analytic_tangents(script, names, namespace):
+    # Run the top-level assignments of 'names' (the time axis and the curves) and then the
+    # body of the script's 'if tangent_scheme == "analytic":' block in 'namespace'
+    tree, path = script_tree(script)
+    statements = [node for node in tree.body if isinstance(node, ast.Assign)
+                  and any(isinstance(target, ast.Name) and target.id in names for target in node.targets)]
+    branches = [node for node in tree.body if isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Name) and node.test.left.id == "tangent_scheme"
+                and isinstance(node.test.comparators[0], ast.Constant) and node.test.comparators[0].value == "analytic"]
+    if len(branches) != 1:
+        raise LookupError("%s has no 'analytic' tangent block" % script)
+    exec(compile(ast.Module(body=statements + branches[0].body, type_ignores=[]), path, "exec"), namespace)
+
+# The per-sample loop of the original scripts
+def differentiate (x1, x2, dt):
+    return (x1 - x2)/dt
+
+def loop_tangents(points, dt):
+    points_diff = np.zeros((len(points) - 1, 3))
+    for N in range(len(points) - 1):
+        dx = -differentiate(points[N, 0], points[N+1, 0], dt)
+        dy = -differentiate(points[N, 1], points[N+1, 1], dt)
+        dz = -differentiate(points[N, 2], points[N+1, 2], dt)
+        points_diff[N] = [dx, dy, dz]
+    return points_diff
+
+# The vortex curve of animated_vortex_3D.py and its exact derivative, worked out by hand
+def curve(t):
+    return np.stack([np.cosh(t) * np.cos(10*t) * np.cos(2*t),
+                     np.cosh(1 - t) * np.sin(10*t) * np.cos(2*t),
+                     t * np.cos(0.2*t)], axis=-1)
+
+def curve_derivative(t):
+    return np.stack([np.sinh(t) * np.cos(10*t) * np.cos(2*t)
+                     - 10 * np.cosh(t) * np.sin(10*t) * np.cos(2*t)
+                     - 2 * np.cosh(t) * np.cos(10*t) * np.sin(2*t),
+                     -np.sinh(1 - t) * np.sin(10*t) * np.cos(2*t)
+                     + 10 * np.cosh(1 - t) * np.cos(10*t) * np.cos(2*t)
+                     - 2 * np.cosh(1 - t) * np.sin(10*t) * np.sin(2*t),
+                     np.cos(0.2*t) - 0.2 * t * np.sin(0.2*t)], axis=-1)
+
+def check_differentiate_curve(differentiate_curve):
+    dt = 0.01
+    t = np.arange(0, 3, dt)
+    points = curve(t)
+
+    # "forward": same values and sign as the loop, i.e. pointing from p[N] towards p[N+1]
+    forward = differentiate_curve(points, dt)
+    assert forward.shape == (len(t) - 1, 3)
+    assert np.allclose(forward, loop_tangents(points, dt), rtol=0, atol=1e-12)
+    assert np.all(np.einsum('ij,ij->i', forward, points[1:] - points[:-1]) > 0)
+    print("  forward matches the loop on %d samples" % len(t))
+
+    # A family of curves is differentiated along its sample axis, curve by curve
+    family = np.stack([points, 2*points, points[::-1]])
+    tangents = differentiate_curve(family, dt)
+    for curve_points, curve_tangents in zip(family, tangents):
+        assert np.allclose(curve_tangents, loop_tangents(curve_points, dt), rtol=0, atol=1e-12)
+    print("  (L, N, 3) input matches the loop curve by curve")
+
+    # Error against the exact derivative; halving dt should divide it by 2, 4 and 16
+    # (measured away from the ends, where "central4" falls back to second order)
+    def interior_error(scheme, dt):
+        t = np.arange(0, 3, dt)
+        tangents = differentiate_curve(curve(t), dt, scheme)
+        exact = curve_derivative(t)
+        if scheme == "forward":
+            # The forward tangent N approximates the derivative at t[N]
+            exact = exact[:-1]
+        interior = slice(int(0.1/dt), -int(0.1/dt))
+        return np.abs(tangents[interior] - exact[interior]).max()
+
+    for scheme, order in (("forward", 1), ("central", 2), ("central4", 4)):
+        coarse = interior_error(scheme, 0.002)
+        fine = interior_error(scheme, 0.001)
+        measured = np.log2(coarse / fine)
+        print("  %-8s  max error %.3e at dt=0.001, observed order %.2f" % (scheme, fine, measured))
+        assert abs(measured - order) < 0.2
+
+    # The ends of "central" and "central4" are second order accurate as well
+    ends = slice(None, 2)
+    for scheme in ("central", "central4"):
+        errors = []
+        for step in (0.002, 0.001):
+            t = np.arange(0, 3, step)
+            errors.append(np.abs(differentiate_curve(curve(t), step, scheme)[ends] - curve_derivative(t)[ends]).max())
+        assert abs(np.log2(errors[0] / errors[1]) - 2) < 0.3
+
+    try:
+        differentiate_curve(points, dt, "backward")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown scheme accepted")
+
+# Each script, the sampler its curves use and the names of its time axis and curves
+scripts = [("animated_vortex_3D.py", "sample_curve", ("dt", "t", "points")),
+           ("../06 - 2D Animated vector field/vector_field_2D.py", "sample_curve_family",
+            ("dt", "t", "offsets", "signs", "all_points"))]
+
+for script, sampler, names in scripts:
+    print(os.path.basename(script))
+    namespace = {"np": np, "exp": np.exp, "pi": np.pi, "arange": np.arange, "tangent_scheme": "analytic"}
+    load_functions(script, ["differentiate_curve", sampler], namespace)
+    check_differentiate_curve(namespace["differentiate_curve"])
+
+    # The derivative the script ships for "analytic" tangents must be the derivative of its
+    # curves: compare it with fourth order differences of the curves away from the ends
+    run_analytic_tangents(script, names, namespace)
+    points = namespace[names[-1]]
+    analytic = namespace["points_diff"]
+    assert analytic.shape == points.shape
+    numerical = namespace["differentiate_curve"](points, namespace["dt"], "central4")
+    error = np.abs(analytic - numerical)[..., 2:-2, :].max() / np.abs(analytic).max()
+    print("  analytic tangents match central4 differences, max relative error %.1e" % error)
+    assert error < 1e-6
+print("All checks passed")